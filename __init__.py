@@ -1,3 +1,14 @@
-from .jklm_bot import JKLMBot
+from .jklm_bot import JKLMBot, load_words
+from .word_index import LANGUAGES, UsedWords, WordIndex, index_file, shared_index
+from .browser_pool import BrowserPool
+from .browser_memory import MemoryBudget, browser_rss, process_tree_rss, session_rss
+from .fleet_stats import StatsChannel
+from .outcome_store import OutcomeStore
+from .blacklist import Blacklist, shared_blacklist
+from .index_daemon import IndexClient, IndexDaemon, default_socket_path
 from .gui import *
 from .indexing import *
+from .async_runtime import AsyncJKLMBot, BotRuntime, LoopRefiller, run_bots
+from .metrics import CallbackSink, JsonlSink, MetricsSink, PrometheusSink, TurnMetrics
+from .coverage import CoverageSelector, LetterCoverage
+from .answer_cache import AnswerCache, RefillWorker
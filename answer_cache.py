@@ -0,0 +1,181 @@
+import collections
+import threading
+
+from .word_index import UsedWords, WordIndex
+
+
+# The refill worker every bot's cache shares unless it's given another one, started by the first cache
+_shared_worker = None
+_shared_worker_lock = threading.Lock()
+
+
+class AnswerCache:
+    """Ready to type answers for the combos a bot is likely to get, so choosing a word during a turn is a pop.
+    A refiller (see RefillWorker) keeps the candidates of the most common combos topped up using the bot's own
+    choose function, so they're already in the bot's length window and strategy. Combos the game showed the bot
+    come first, then the combos the index was weighted towards, then the ones with the most words"""
+
+    def __init__(
+        self,
+        choose,
+        word_index: WordIndex,
+        used_words: UsedWords,
+        size: int = 4,
+        max_combos: int = 512,
+    ):
+        # Gets a combo and returns the id of an unused word for it, or None
+        self.choose = choose
+        self.word_index = word_index
+        self.used_words = used_words
+        # Candidates kept for every combo, and how many combos to keep them for
+        self.size = size
+        self.max_combos = max_combos
+        self.candidates = {}
+        # How many times the bot got each combo
+        self.seen = collections.Counter()
+        self.hits = 0
+        self.misses = 0
+        self.refiller = None
+        self._lock = threading.Lock()
+        # Whether candidates were taken since the last refill started, and the refill in progress
+        self._wanted = True
+        self._refills = None
+
+    def start(self, refiller=None):
+        """Start filling the cache in the background, with the given refiller or the one shared by every bot"""
+        self.refiller = refiller or shared_refill_worker()
+        self._wanted = True
+        self.refiller.add(self)
+
+    def stop(self):
+        if self.refiller is not None:
+            self.refiller.remove(self)
+
+    def pop(self, combo: str):
+        """Returns a cached unused word id for the combo, or None if there is none"""
+        word_id = None
+        with self._lock:
+            self.seen[combo] += 1
+            candidates = self.candidates.get(combo)
+            while candidates and word_id is None:
+                word_id = candidates.popleft()
+                # Might have been used for another combo since it was cached
+                if word_id in self.used_words:
+                    word_id = None
+            if word_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        # Replace the popped candidates
+        self._want()
+        return word_id
+
+    def clear(self):
+        """Drop every cached candidate, when the bot's choices change"""
+        with self._lock:
+            self.candidates.clear()
+        self._want()
+
+    def refill_step(self) -> bool:
+        """Chooses one missing candidate. Returns False once the cache has every candidate it wants, until more
+        are taken"""
+        while True:
+            if self._refills is None:
+                if not self._wanted:
+                    return False
+                self._wanted = False
+                self._refills = self._missing()
+            for combo in self._refills:
+                if self._add_candidate(combo):
+                    return True
+            self._refills = None
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _priorities(self):
+        """Returns the combos to keep candidates for, most wanted first"""
+        # The combos the game was seen showing most, then the ones with the most words
+        common_combos = self.word_index.common_combos(self.max_combos)
+        with self._lock:
+            seen = [combo for combo, _ in self.seen.most_common(self.max_combos)]
+        combos = dict.fromkeys(seen + common_combos)
+        return list(combos)[: self.max_combos]
+
+    def _want(self):
+        self._wanted = True
+        if self.refiller is not None:
+            self.refiller.wake()
+
+    def _missing(self):
+        """Yields the combos to add a candidate to, until the cache is full"""
+        # Add a candidate to every combo on each pass, so the common combos are filled first
+        for _ in range(self.size):
+            yield from self._priorities()
+
+    def _add_candidate(self, combo: str) -> bool:
+        """Chooses a candidate for the combo if it needs one, returns whether it did"""
+        with self._lock:
+            candidates = self.candidates.setdefault(combo, collections.deque())
+            if len(candidates) >= self.size:
+                return False
+            cached = set(candidates)
+        word_id = self.choose(combo)
+        if word_id is None or word_id in cached:
+            return True
+        with self._lock:
+            candidates = self.candidates.setdefault(combo, collections.deque())
+            if len(candidates) < self.size:
+                candidates.append(word_id)
+        return True
+
+
+class RefillWorker:
+    """Refills the AnswerCaches of any number of bots from a single background thread.
+    The caches take turns, one candidate at a time, so adding a bot doesn't add a thread and a bot which just
+    answered doesn't wait behind the others' whole refills"""
+
+    def __init__(self):
+        self._caches = {}
+        self._lock = threading.Lock()
+        self._wanted = threading.Event()
+        self._thread = None
+
+    def add(self, cache: AnswerCache):
+        """Start refilling the cache, starting the worker's thread the first time"""
+        with self._lock:
+            self._caches[cache] = None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self.wake()
+
+    def remove(self, cache: AnswerCache):
+        with self._lock:
+            self._caches.pop(cache, None)
+
+    def wake(self):
+        """Called by the caches when candidates were taken"""
+        self._wanted.set()
+
+    def _run(self):
+        while True:
+            self._wanted.wait()
+            self._wanted.clear()
+            while True:
+                with self._lock:
+                    caches = list(self._caches)
+                # Every cache gets its turn on each pass
+                refilled = [cache.refill_step() for cache in caches]
+                if not any(refilled):
+                    break
+
+
+def shared_refill_worker() -> RefillWorker:
+    """Returns the refill worker shared by every bot in this process"""
+    global _shared_worker
+    with _shared_worker_lock:
+        if _shared_worker is None:
+            _shared_worker = RefillWorker()
+        return _shared_worker
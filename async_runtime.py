@@ -0,0 +1,290 @@
+import asyncio
+import threading
+
+from . import page_scripts
+from .async_webdriver import ENTER, AsyncChromeDriver, AsyncWebDriverError
+from .browser_memory import session_rss
+from .jklm_bot import (
+    BLOCKED_URLS,
+    LEAN_CHROME_PREFS,
+    JKLMBot,
+    chrome_arguments,
+    chromedriver_path,
+)
+
+# Errors meaning the bot's browser or game is gone, so the bot should stop
+KICKED_ERRORS = ("stale element reference", "invalid session id", "no such window")
+
+
+class AsyncJKLMBot(JKLMBot):
+    """A bot which plays with coroutines instead of a thread of its own.
+    It chooses words the same way as JKLMBot, but all of its waiting is done on the event loop"""
+
+    def __init__(self, *args, started_by_gui: bool = False, **kwargs):
+        self.headless = started_by_gui
+        super().__init__(*args, started_by_gui=started_by_gui, **kwargs)
+
+    def start_browser(self, headless: bool):
+        # The browser is only started once the bot runs on the event loop
+        return None
+
+    async def main(self, driver: AsyncChromeDriver, refiller=None):
+        """Start a browser session on the given chromedriver and play until the bot is stopped or kicked.
+        The bot's answers are refilled by the given LoopRefiller, or by one of its own"""
+        own_refiller = LoopRefiller() if refiller is None else None
+        self.answers.start(refiller or own_refiller)
+        try:
+            self.browser = await self.new_browser(driver)
+            await self.enter_room()
+            await self.play()
+        # The bot was kicked
+        except AsyncWebDriverError as error:
+            if error.error not in KICKED_ERRORS:
+                raise
+        finally:
+            self.answers.stop()
+            if own_refiller is not None:
+                own_refiller.stop()
+
+    async def new_browser(self, driver: AsyncChromeDriver):
+        """Start a browser session, set up the same way as jklm_bot.launch_browser"""
+        lean = self.lean_browser
+        browser = await driver.new_session(
+            chrome_arguments(self.headless, lean), LEAN_CHROME_PREFS if lean else None
+        )
+        if lean:
+            await browser.execute_cdp_cmd("Network.enable")
+            await browser.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": list(BLOCKED_URLS)}
+            )
+        return browser
+
+    async def play(self):
+        """The bot's logic while in the room, playing matches one after the other.
+        The same as JKLMBot.play, with the browser's part awaited"""
+        self.state = self.JOINING
+        await self.join_game(first=True)
+
+        # Watch the game for turns instead of polling it, the watcher stays between games
+        await self.browser.set_script_timeout(self.HOUR)
+        await self.browser.execute_script(page_scripts.INSTALL_WATCHER)
+
+        self.state = self.LOBBY
+        self.measure_memory()
+        while True:
+            if self.state == self.JOINING:
+                await self.join_game()
+                self.state = self.LOBBY
+
+            # Give the game some time to accept the answer, have it reguess if it wasn't
+            event = await self.next_event(self.RETRY_TIME if self.guessing else None)
+            if event is None:
+                event = dict(
+                    await self.browser.execute_script(page_scripts.WATCHER_STATE),
+                    type="timeout",
+                )
+            combo = self.handle_event(event)
+            if combo is not None:
+                await self.take_turn(combo, await self.answer_box())
+
+    async def answer_box(self):
+        """The box to enter the guesses in"""
+        return await self.locate(page_scripts.ANSWER_PATH, self.HOUR)
+
+    async def locate(self, xpath: str, timeout: float, clickable: bool = False):
+        """Returns the element at the xpath, once it's clickable if asked.
+        The element is only looked up the first time, and again if it stops being valid"""
+        element = self.elements.get(xpath)
+        if element is not None:
+            try:
+                if not clickable:
+                    return element
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + timeout
+                while not await self.browser.is_clickable(element):
+                    if loop.time() > deadline:
+                        raise TimeoutError(f"{xpath} didn't become clickable in time")
+                    await asyncio.sleep(0.25)
+                return element
+            except AsyncWebDriverError as error:
+                # Anything but the game replacing the element
+                if error.error != "stale element reference":
+                    raise
+
+        element = self.elements[xpath] = await self.browser.wait_for_element(
+            xpath, timeout, clickable
+        )
+        return element
+
+    async def next_event(self, timeout: float = None):
+        """Waits until the game watcher reports an event and returns it.
+        Returns None if a timeout (in seconds) is given and no event came in that time"""
+        return await self.browser.execute_async_script(
+            page_scripts.WAIT_FOR_EVENT, None if timeout is None else timeout * 1000
+        )
+
+    async def take_turn(self, combo, enter_box):
+        """Choose a word for the given combo and send it to the game"""
+        # Make it so the bot appears to think
+        if self.humanlike:
+            await asyncio.sleep(self.thinking_time())
+        # Send the answer to the game
+        self.answer_sent(await self.enter_answer(self.prepare_answer(combo), enter_box))
+
+    def browser_memory(self):
+        return session_rss(self.browser)
+
+    async def enter_room(self):
+        """Enters a room with a given link and inputs the nickname"""
+        # Enter the room
+        await self.browser.get(self.game_link)
+
+        # Get the element when it's clickable
+        name_element = await self.browser.wait_for_element(
+            page_scripts.NAME_PATH, 20, clickable=True
+        )
+
+        # Delete the original text
+        await self.browser.clear(name_element)
+        # Enter the bot's name and send the input
+        await self.browser.send_keys(name_element, self.bot_name + ENTER)
+
+    async def stop(self):
+        """Kill the bot"""
+        self.answers.stop()
+        if self.browser is not None:
+            await self.browser.close()
+
+    async def join_game(self, first: bool = False):
+        """Joins a game in the room the bot is in"""
+        if first:
+            if "bot" in self.bot_name:
+                # Open chat
+                open_chat_element = await self.browser.wait_for_element(
+                    page_scripts.OPEN_CHAT_PATH, 5, clickable=True
+                )
+                await self.browser.click(open_chat_element)
+
+                # Send a msg shouting out this bot
+                chat = await self.browser.wait_for_element(
+                    page_scripts.CHAT_PATH, 3, clickable=True
+                )
+                await self.browser.send_keys(chat, self.SHOUTOUT + ENTER)
+
+            # Switch to the join button's frame if it's our first time joining
+            frame = await self.browser.wait_for_element(
+                page_scripts.FRAME_PATH, self.HOUR
+            )
+            await self.browser.switch_to_frame(frame)
+
+        # Join the game, usually with the same button as last game
+        join_button = await self.locate(
+            page_scripts.JOIN_PATH, self.HOUR, clickable=True
+        )
+        await self.browser.click(join_button)
+
+    async def enter_answer(self, answer: str, enter_field):
+        """Enters the given answer into the answer bar, typed by the page itself"""
+        keystrokes = [
+            [keys, round(delay * 1000)] for keys, delay in self.keystroke_schedule(answer)
+        ]
+        try:
+            return await self.browser.execute_async_script(
+                page_scripts.PLAY_KEYSTROKES, enter_field, keystrokes
+            )
+        except AsyncWebDriverError as error:
+            if error.error != "stale element reference":
+                raise
+        # The game replaced the answer box, type in the new one
+        self.elements.pop(page_scripts.ANSWER_PATH, None)
+        return await self.browser.execute_async_script(
+            page_scripts.PLAY_KEYSTROKES, await self.answer_box(), keystrokes
+        )
+
+
+class LoopRefiller:
+    """Refills the AnswerCaches of the bots on an event loop from a single task, in between the bots' own work.
+    It takes the place of answer_cache.RefillWorker's thread, so the bots on the loop don't add threads"""
+
+    def __init__(self):
+        self._caches = {}
+        self._wanted = asyncio.Event()
+        self._task = None
+
+    def add(self, cache):
+        """Start refilling the cache, starting the task the first time. Called on the loop"""
+        self._caches[cache] = None
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self.wake()
+
+    def remove(self, cache):
+        self._caches.pop(cache, None)
+
+    def wake(self):
+        """Called by the caches when candidates were taken, always on the loop since the bots run on it"""
+        self._wanted.set()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            await self._wanted.wait()
+            self._wanted.clear()
+            # One candidate of every cache at a time, letting the bots take their turns in between
+            while any([cache.refill_step() for cache in list(self._caches)]):
+                await asyncio.sleep(0)
+
+
+class BotRuntime:
+    """Runs any number of AsyncJKLMBots on a single event loop, in one background thread.
+    All of the bots share one chromedriver and one LoopRefiller, so adding a bot doesn't add threads"""
+
+    def __init__(self, executable_path: str = None):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.driver = AsyncChromeDriver(executable_path or chromedriver_path())
+        self.refiller = LoopRefiller()
+        self.bots = {}
+
+    def start(self):
+        """Start the event loop and chromedriver"""
+        self.thread.start()
+        self.run(self.driver.start()).result()
+
+    def run(self, coroutine):
+        """Schedule a coroutine on the runtime's loop, can be called from any thread"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def add_bot(self, bot: AsyncJKLMBot):
+        """Start running the bot, returns a future which is done when the bot stops"""
+        future = self.bots[bot] = self.run(bot.main(self.driver, self.refiller))
+        return future
+
+    def stop_bot(self, bot: AsyncJKLMBot):
+        """Stop a running bot and close its browser"""
+        self.bots.pop(bot).cancel()
+        return self.run(bot.stop())
+
+    def stop(self):
+        """Stop every bot, chromedriver and the event loop"""
+        for bot in list(self.bots):
+            self.stop_bot(bot).result()
+        self.run(self.driver.stop()).result()
+        self.loop.call_soon_threadsafe(self.refiller.stop)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+async def run_bots(bots, executable_path: str = None):
+    """Run the given AsyncJKLMBots until all of them stop, on the current event loop"""
+    driver = AsyncChromeDriver(executable_path or chromedriver_path())
+    refiller = LoopRefiller()
+    await driver.start()
+    try:
+        await asyncio.gather(*(bot.main(driver, refiller) for bot in bots))
+    finally:
+        refiller.stop()
+        await driver.stop()
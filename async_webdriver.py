@@ -0,0 +1,206 @@
+import asyncio
+import json
+import socket
+import subprocess
+
+# The key W3C WebDriver uses for element references
+ELEMENT_KEY = "element-6066-11e4-a52f-4ae52a0a5731"
+ENTER = "\ue007"
+
+
+class AsyncWebDriverError(Exception):
+    """An error returned by the WebDriver server"""
+
+    def __init__(self, error: str, message: str):
+        super().__init__(f"{error}: {message}")
+        self.error = error
+        self.message = message
+
+
+class AsyncChromeDriver:
+    """A single chromedriver process, talked to over the W3C WebDriver protocol with asyncio.
+    One chromedriver can hold the sessions of any number of bots"""
+
+    def __init__(self, executable_path: str):
+        self.executable_path = executable_path
+        self.port = None
+        self.process = None
+
+    async def start(self, timeout: float = 20):
+        """Start chromedriver and wait until it accepts sessions"""
+        self.port = free_port()
+        self.process = await asyncio.create_subprocess_exec(
+            self.executable_path,
+            f"--port={self.port}",
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                if (await self.request("GET", "/status"))["ready"]:
+                    return
+            except OSError:
+                pass
+            if loop.time() > deadline:
+                raise TimeoutError("chromedriver didn't start in time")
+            await asyncio.sleep(0.1)
+
+    async def stop(self):
+        """Kill chromedriver, along with every browser it started"""
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+    async def new_session(self, arguments=(), prefs=None):
+        """Launch a new chrome browser with the given command line arguments and profile preferences"""
+        chrome_options = {"args": list(arguments), "w3c": True}
+        if prefs:
+            chrome_options["prefs"] = prefs
+        capabilities = {
+            "capabilities": {
+                "alwaysMatch": {
+                    "browserName": "chrome",
+                    "goog:chromeOptions": chrome_options,
+                }
+            }
+        }
+        value = await self.request("POST", "/session", capabilities)
+        return AsyncSession(self, value["sessionId"], value.get("capabilities", {}))
+
+    async def request(self, method: str, path: str, body=None):
+        """Send a command to chromedriver and return its value.
+        Every command gets its own connection, so a long running command doesn't block the others"""
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        try:
+            writer.write(
+                (
+                    f"{method} {path} HTTP/1.1\r\n"
+                    f"Host: 127.0.0.1:{self.port}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("ascii")
+                + data
+            )
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+
+        head, _, payload = response.partition(b"\r\n\r\n")
+        if b"transfer-encoding: chunked" in head.lower():
+            payload = decode_chunked(payload)
+        value = json.loads(payload)["value"]
+
+        status = int(head.split(b" ", 2)[1])
+        if status >= 400:
+            raise AsyncWebDriverError(value.get("error"), value.get("message"))
+        return value
+
+
+class AsyncSession:
+    """A single browser session, with the commands the bot uses"""
+
+    def __init__(self, driver: AsyncChromeDriver, session_id: str, capabilities=None):
+        self.driver = driver
+        self.session_id = session_id
+        # The profile directory chromedriver made for the session's browser, which tells its processes apart
+        self.user_data_dir = (capabilities or {}).get("chrome", {}).get("userDataDir")
+
+    async def command(self, method: str, path: str, body=None):
+        return await self.driver.request(
+            method, f"/session/{self.session_id}{path}", body
+        )
+
+    async def get(self, url: str):
+        await self.command("POST", "/url", {"url": url})
+
+    async def find_element(self, xpath: str):
+        """Returns a reference to the first element matching the xpath"""
+        return await self.command(
+            "POST", "/element", {"using": "xpath", "value": xpath}
+        )
+
+    async def wait_for_element(
+        self, xpath: str, timeout: float, clickable: bool = False
+    ):
+        """Waits until an element matching the xpath exists (and is clickable, if asked) and returns it"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                element = await self.find_element(xpath)
+                if not clickable or await self.is_clickable(element):
+                    return element
+            except AsyncWebDriverError as error:
+                if error.error not in ("no such element", "stale element reference"):
+                    raise
+            if loop.time() > deadline:
+                raise TimeoutError(f"{xpath} didn't appear in time")
+            await asyncio.sleep(0.25)
+
+    async def is_clickable(self, element) -> bool:
+        element_path = f"/element/{element[ELEMENT_KEY]}"
+        displayed = await self.command("GET", f"{element_path}/displayed")
+        return displayed and await self.command("GET", f"{element_path}/enabled")
+
+    async def click(self, element):
+        await self.command("POST", f"/element/{element[ELEMENT_KEY]}/click", {})
+
+    async def clear(self, element):
+        await self.command("POST", f"/element/{element[ELEMENT_KEY]}/clear", {})
+
+    async def send_keys(self, element, text: str):
+        await self.command(
+            "POST", f"/element/{element[ELEMENT_KEY]}/value", {"text": text}
+        )
+
+    async def switch_to_frame(self, element):
+        await self.command("POST", "/frame", {"id": element})
+
+    async def set_script_timeout(self, seconds: float):
+        await self.command("POST", "/timeouts", {"script": round(seconds * 1000)})
+
+    async def execute_script(self, script: str, *args):
+        return await self.command(
+            "POST", "/execute/sync", {"script": script, "args": list(args)}
+        )
+
+    async def execute_async_script(self, script: str, *args):
+        return await self.command(
+            "POST", "/execute/async", {"script": script, "args": list(args)}
+        )
+
+    async def execute_cdp_cmd(self, cmd: str, params=None):
+        """Run a Chrome DevTools Protocol command in the browser and return its result"""
+        return await self.command(
+            "POST", "/goog/cdp/execute", {"cmd": cmd, "params": params or {}}
+        )
+
+    async def close(self):
+        """End the session and close its browser"""
+        await self.command("DELETE", "")
+
+
+def decode_chunked(payload: bytes) -> bytes:
+    """Decode an HTTP body sent with chunked transfer encoding"""
+    body = b""
+    while payload:
+        size, _, payload = payload.partition(b"\r\n")
+        size = int(size.split(b";")[0], 16)
+        if size == 0:
+            break
+        body += payload[:size]
+        payload = payload[size + 2 :]
+    return body
+
+
+def free_port() -> int:
+    """Returns a free local port"""
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        return free_socket.getsockname()[1]
@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import bisect
+import time
+
+from .async_runtime import AsyncJKLMBot, LoopRefiller
+from .async_webdriver import AsyncChromeDriver
+from .jklm_bot import chromedriver_path
+from .metrics import percentile
+from .mock_server import MockServer
+
+
+class TimedBot(AsyncJKLMBot):
+    """A bot which records how long each part of its turns took"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # time.time() and syllable of every turn start the bot noticed
+        self.turns_detected = []
+        # Seconds it took to choose each word and to submit each answer
+        self.selection_times = []
+        self.submit_times = []
+
+    async def next_event(self, timeout: float = None):
+        event = await super().next_event(timeout)
+        if event is not None and event["type"] == "turn":
+            self.turns_detected.append((time.time(), event["syllable"]))
+        return event
+
+    def select_answer(self, combo):
+        # Only the choices made during turns, not the ones the refiller makes in between
+        start = time.perf_counter()
+        word_id = super().select_answer(combo)
+        self.selection_times.append(time.perf_counter() - start)
+        return word_id
+
+    async def enter_answer(self, answer: str, enter_field):
+        start = time.perf_counter()
+        typing_times = await super().enter_answer(answer, enter_field)
+        self.submit_times.append(time.perf_counter() - start)
+        return typing_times
+
+
+async def run_benchmark(
+    bot_count: int,
+    players_per_room: int,
+    games: int,
+    turns_per_game: int,
+    executable_path: str,
+):
+    """Plays scripted games on a local mock server with the given number of bots and returns the latencies
+    (in seconds) of turn detection, word selection and answer submission"""
+    server = MockServer(
+        turns_per_game=turns_per_game, min_players=min(players_per_room, bot_count)
+    )
+    server.start()
+
+    bots = []
+    for i in range(bot_count):
+        # Split the bots between rooms, so turns happen in parallel
+        room = f"R{i // players_per_room:03}"
+        # Create the room now, rooms are otherwise only created once a bot loads them
+        server.room(room)
+        if (i // players_per_room + 1) * players_per_room > bot_count:
+            server.room(room).min_players = bot_count % players_per_room
+        bots.append(
+            TimedBot(
+                game_link=server.room_link(room),
+                bot_name=f"bench {i}",
+                think_time=(0, 0),
+                typing_speed=(0, 0),
+                mistake_chance=0,
+                speedup=0,
+                humanlike=False,
+                started_by_gui=True,
+            )
+        )
+
+    driver = AsyncChromeDriver(executable_path)
+    refiller = LoopRefiller()
+    await driver.start()
+    tasks = [asyncio.ensure_future(bot.main(driver, refiller)) for bot in bots]
+    try:
+        while not all(room.games_played >= games for room in server.rooms.values()):
+            await asyncio.sleep(0.5)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*(bot.stop() for bot in bots), return_exceptions=True)
+        refiller.stop()
+        await driver.stop()
+        server.shutdown()
+
+    detection_times = []
+    for bot in bots:
+        turns = sorted(
+            (turn["started"], turn["syllable"])
+            for room in server.rooms.values()
+            for turn in room.turn_log
+            if turn["player"] == bot.bot_name
+        )
+        starts = [started for started, _ in turns]
+        # A turn with the same syllable as the last one isn't noticed as a new turn, so match every
+        # detection to the bot's latest turn with its syllable which started before it
+        for detected, syllable in bot.turns_detected:
+            i = bisect.bisect_right(starts, detected) - 1
+            while i >= 0 and turns[i][1] != syllable:
+                i -= 1
+            if i >= 0:
+                detection_times.append(detected - starts[i])
+
+    return {
+        "turn detection": detection_times,
+        "word selection": [t for bot in bots for t in bot.selection_times],
+        "answer submit": [t for bot in bots for t in bot.submit_times],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure turn latencies of headless bots against a local mock game"
+    )
+    parser.add_argument("--bots", default="1,5,20,50", help="comma separated bot counts")
+    parser.add_argument("--players-per-room", type=int, default=2)
+    parser.add_argument("--games", type=int, default=2, help="games each room plays")
+    parser.add_argument("--turns", type=int, default=20, help="turns per game")
+    parser.add_argument("--chromedriver", default=None)
+    args = parser.parse_args()
+
+    print(f"{'bots':>5} {'measure':<15} {'p50 (ms)':>10} {'p99 (ms)':>10} {'samples':>8}")
+    for bot_count in map(int, args.bots.split(",")):
+        results = asyncio.run(
+            run_benchmark(
+                bot_count,
+                args.players_per_room,
+                args.games,
+                args.turns,
+                args.chromedriver or chromedriver_path(),
+            )
+        )
+        for measure, values in results.items():
+            print(
+                f"{bot_count:>5} {measure:<15} {percentile(values, 50) * 1000:>10.2f} "
+                f"{percentile(values, 99) * 1000:>10.2f} {len(values):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+
+# File layout: the header (MAGIC, version, hash count and bit count), then the bits
+MAGIC = b"BPBF"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+
+# Blacklists shared by every bot in the process, by path
+_shared_blacklists = {}
+_shared_blacklists_lock = threading.Lock()
+
+
+class Blacklist:
+    """A persistent Bloom filter of the words the game rejected.
+    Checking and adding a word is O(1) and the file is memory mapped, so it loads instantly and additions are
+    saved as they're made. A word which was never added is reported as blacklisted with a chance of about
+    error_rate, a word which was added is always reported"""
+
+    def __init__(
+        self, path: str, capacity: int = 2_000_000, error_rate: float = 0.001
+    ):
+        if not os.path.exists(path):
+            self._create(path, capacity, error_rate)
+
+        with open(path, "r+b") as blacklist_file:
+            self._mmap = mmap.mmap(blacklist_file.fileno(), 0)
+        magic, version, self.hash_count, self.bit_count = HEADER.unpack_from(
+            self._mmap
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a blacklist")
+        self._lock = threading.Lock()
+
+    def __contains__(self, word: str):
+        return all(
+            self._mmap[HEADER.size + bit // 8] & (1 << bit % 8)
+            for bit in self._bits(word)
+        )
+
+    def add(self, word: str):
+        with self._lock:
+            for bit in self._bits(word):
+                self._mmap[HEADER.size + bit // 8] |= 1 << bit % 8
+
+    def update(self, words):
+        """Add every one of the words, for example the rejected words of an OutcomeStore"""
+        for word in words:
+            self.add(word)
+
+    def flush(self):
+        """Make sure every addition is written to the file"""
+        self._mmap.flush()
+
+    def close(self):
+        self._mmap.flush()
+        self._mmap.close()
+
+    @staticmethod
+    def _create(path: str, capacity: int, error_rate: float):
+        # The optimal bit and hash counts for the capacity and error rate
+        bit_count = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        bit_count = (bit_count + 7) // 8 * 8
+        hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        try:
+            with open(path, "xb") as blacklist_file:
+                blacklist_file.write(
+                    HEADER.pack(MAGIC, FORMAT_VERSION, hash_count, bit_count)
+                )
+                blacklist_file.truncate(HEADER.size + bit_count // 8)
+        # Another process just created it
+        except FileExistsError:
+            pass
+
+    def _bits(self, word: str):
+        """The bits of the word, from two halves of a single hash (double hashing)"""
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=16).digest()
+        first, second = struct.unpack("<QQ", digest)
+        return ((first + i * second) % self.bit_count for i in range(self.hash_count))
+
+
+def shared_blacklist(path: str) -> Blacklist:
+    """Returns the blacklist at the given path, opening (or creating) it the first time it's requested"""
+    with _shared_blacklists_lock:
+        if path not in _shared_blacklists:
+            _shared_blacklists[path] = Blacklist(path)
+        return _shared_blacklists[path]
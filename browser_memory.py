@@ -0,0 +1,98 @@
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# What a bot's browser is assumed to take before any bot was measured, in bytes
+DEFAULT_BOT_MEMORY = 300 * 2**20
+# Bots allowed when memory can't be measured, the menu's limit before there was a budget
+DEFAULT_BOT_COUNT = 6
+
+
+def process_tree_rss(pid: int):
+    """Returns the total resident memory of a process and all of its descendants in bytes,
+    or None if it can't be measured (no psutil, or the process is gone)"""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        # Exited while we were counting
+        except psutil.Error:
+            pass
+    return total
+
+
+def browser_rss(browser):
+    """Returns the resident memory of a selenium chrome browser, chromedriver and every chrome process
+    it started, in bytes, or None if it can't be measured"""
+    try:
+        pid = browser.service.process.pid
+    except AttributeError:
+        return None
+    return process_tree_rss(pid)
+
+
+def session_rss(session):
+    """Returns the resident memory of the chrome browser of an async_webdriver session and every process it
+    started, in bytes, or None if it can't be measured. The sessions share a chromedriver, so the session's own
+    chrome is found among its children by the session's profile directory"""
+    if psutil is None or session is None or not session.user_data_dir:
+        return None
+    profile_argument = f"--user-data-dir={session.user_data_dir}"
+    try:
+        browsers = psutil.Process(session.driver.process.pid).children()
+    except (AttributeError, psutil.Error):
+        return None
+    for browser in browsers:
+        try:
+            if profile_argument in browser.cmdline():
+                return process_tree_rss(browser.pid)
+        # Exited while we were looking
+        except psutil.Error:
+            pass
+    return None
+
+
+class MemoryBudget:
+    """How much memory the bots' browsers may take, which decides whether another bot can be started.
+    A new bot is expected to take as much as the average measured bot, or bot_estimate before any bot was
+    measured. By default the budget is a fraction of the memory which was available when it was created"""
+
+    def __init__(
+        self,
+        budget: int = None,
+        fraction: float = 0.75,
+        bot_estimate: int = DEFAULT_BOT_MEMORY,
+    ):
+        self.bot_estimate = bot_estimate
+        if budget is None:
+            if psutil is None:
+                budget = DEFAULT_BOT_COUNT * bot_estimate
+            else:
+                budget = int(psutil.virtual_memory().available * fraction)
+        self.budget = budget
+
+    def per_bot(self, usages) -> int:
+        """The memory a bot is expected to take, given the measured usages of the running bots"""
+        measured = [usage for usage in usages if usage]
+        if not measured:
+            return self.bot_estimate
+        return sum(measured) // len(measured)
+
+    def used(self, usages) -> int:
+        """The memory the running bots take, counting the ones which weren't measured yet as per_bot"""
+        per_bot = self.per_bot(usages)
+        return sum(usage or per_bot for usage in usages)
+
+    def has_room(self, usages) -> bool:
+        """Whether another bot fits in the budget, given the usages of the running bots (None if unknown)"""
+        usages = list(usages)
+        return self.used(usages) + self.per_bot(usages) <= self.budget
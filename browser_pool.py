@@ -0,0 +1,137 @@
+import queue
+import threading
+
+import selenium.common.exceptions
+
+from .jklm_bot import launch_browser
+
+JKLM_URL = "https://jklm.fun"
+
+
+class BrowserPool:
+    """Chrome browsers launched ahead of time, so a bot can start playing without waiting for one.
+    Bots lease a browser when they start and release it when they stop. A browser which crashed is thrown
+    away and replaced in the background, so the pool always has size browsers ready"""
+
+    # Seconds between checks of the idle browsers
+    HEALTH_CHECK_TIME = 30
+
+    def __init__(
+        self,
+        size: int = 2,
+        headless: bool = True,
+        warm_url: str = JKLM_URL,
+        lean: bool = False,
+    ):
+        self.size = size
+        self.headless = headless
+        # Whether the pool's browsers are lean, see launch_browser
+        self.lean = lean
+        # A page the idle browsers wait on, so the bot's room loads from a warm cache. None for a blank page
+        self.warm_url = warm_url
+        self._idle = queue.Queue()
+        self._launching = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def start(self):
+        """Launch the pool's browsers and keep checking on them, in the background"""
+        self._top_up()
+        threading.Thread(target=self._check_health, daemon=True).start()
+
+    def lease(self):
+        """Returns a ready browser, launching one right away if none are ready"""
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._healthy(browser):
+                self._top_up()
+                return browser
+            self._discard(browser)
+
+        self._top_up()
+        return self._launch()
+
+    def release(self, browser):
+        """Take back a leased browser, taking it out of the room it was playing in"""
+        if self._closed.is_set() or self._idle.qsize() >= self.size:
+            self._discard(browser)
+            return
+        try:
+            browser.switch_to.default_content()
+            browser.get(self.warm_url or "about:blank")
+        except selenium.common.exceptions.WebDriverException:
+            self._discard(browser)
+            self._top_up()
+            return
+        self._idle.put(browser)
+
+    def close(self):
+        """Quit every idle browser, leased ones are quit once they're released"""
+        self._closed.set()
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _launch(self):
+        browser = launch_browser(self.headless, self.lean)
+        if self.warm_url:
+            browser.get(self.warm_url)
+        return browser
+
+    def _top_up(self):
+        """Launch browsers in the background until the pool is full"""
+        with self._lock:
+            missing = self.size - self._idle.qsize() - self._launching
+            self._launching += max(0, missing)
+        for _ in range(missing):
+            threading.Thread(target=self._launch_idle, daemon=True).start()
+
+    def _launch_idle(self):
+        try:
+            browser = self._launch()
+        except selenium.common.exceptions.WebDriverException:
+            # Chrome failed to start, try again on the next health check
+            return
+        finally:
+            with self._lock:
+                self._launching -= 1
+        if self._closed.is_set():
+            self._discard(browser)
+        else:
+            self._idle.put(browser)
+
+    def _check_health(self):
+        while not self._closed.wait(self.HEALTH_CHECK_TIME):
+            # Go over the browsers which are idle right now, without blocking leases
+            for _ in range(self._idle.qsize()):
+                try:
+                    browser = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._healthy(browser):
+                    self._idle.put(browser)
+                else:
+                    self._discard(browser)
+            self._top_up()
+
+    @staticmethod
+    def _healthy(browser) -> bool:
+        try:
+            browser.execute_script("return 1;")
+            return True
+        # Either chrome or chromedriver crashed
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(browser):
+        try:
+            browser.quit()
+        # Already gone
+        except Exception:
+            pass
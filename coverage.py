@@ -0,0 +1,92 @@
+import random
+
+try:
+    import numpy
+except ImportError:
+    # Without numpy the candidates are scored one by one, which is fine for all but the largest combos
+    numpy = None
+
+from .word_index import UsedWords, WordIndex
+
+# Every letter of the alphabet, using all of them gives an extra life
+ALPHABET_MASK = (1 << 26) - 1
+
+
+class LetterCoverage:
+    """The letters a bot still has to use to get an extra life"""
+
+    def __init__(self):
+        self.needed = ALPHABET_MASK
+
+    def use(self, mask: int):
+        """Mark the letters of an accepted word as used"""
+        self.needed &= ~mask
+        # Got the extra life, the game starts counting again
+        if not self.needed:
+            self.needed = ALPHABET_MASK
+
+    def reset(self):
+        self.needed = ALPHABET_MASK
+
+
+class CoverageSelector:
+    """Chooses the unused word of a combo which covers the most letters the bot still needs.
+    A word's score is how many needed letters it has, plus length_weight for every letter in it.
+    The scoring is vectorized with numpy over the combo's letter masks when it's installed"""
+
+    def __init__(self, word_index: WordIndex, length_weight: float = 0):
+        self.word_index = word_index
+        self.length_weight = length_weight
+        if numpy is not None:
+            # Views of the memory mapped index, nothing is copied
+            self._masks = numpy.frombuffer(word_index.letter_masks, dtype=numpy.uint32)
+            self._length_starts = numpy.frombuffer(
+                word_index.length_starts, dtype=numpy.uint32
+            )
+
+    def choose(self, postings, start: int, end: int, used_words: UsedWords, needed: int):
+        """Returns the id of the best unused word in postings[start:end], ties broken randomly,
+        or None if all of them were used"""
+        if start == end:
+            return None
+        if numpy is None:
+            return self._choose_slow(postings, start, end, used_words, needed)
+
+        word_ids = numpy.frombuffer(postings, dtype=numpy.uint32)[start:end]
+        scores = _popcount(self._masks[word_ids] & numpy.uint32(needed)).astype(
+            numpy.float64
+        )
+        if self.length_weight:
+            lengths = numpy.searchsorted(self._length_starts, word_ids, side="right") - 1
+            scores += lengths * self.length_weight
+
+        used = numpy.frombuffer(used_words.bits, dtype=numpy.uint8)
+        used = (used[word_ids >> 3] >> (word_ids & 7).astype(numpy.uint8)) & 1
+        scores[used.astype(bool)] = -1
+        best = scores.max()
+        if best < 0:
+            return None
+        return int(word_ids[random.choice(numpy.flatnonzero(scores == best))])
+
+    def _choose_slow(self, postings, start, end, used_words, needed):
+        best_ids = []
+        best = -1
+        for word_id in postings[start:end]:
+            if word_id in used_words:
+                continue
+            score = bin(self.word_index.letter_mask(word_id) & needed).count("1")
+            if self.length_weight:
+                score += len(self.word_index.word(word_id)) * self.length_weight
+            if score > best:
+                best_ids, best = [word_id], score
+            elif score == best:
+                best_ids.append(word_id)
+        return random.choice(best_ids) if best_ids else None
+
+
+def _popcount(masks):
+    """Counts the set bits of every uint32 in the array"""
+    masks = masks - ((masks >> 1) & 0x55555555)
+    masks = (masks & 0x33333333) + ((masks >> 2) & 0x33333333)
+    masks = (masks + (masks >> 4)) & 0x0F0F0F0F
+    return (masks * numpy.uint32(0x01010101)) >> 24
@@ -0,0 +1,24 @@
+import queue
+
+
+class StatsChannel:
+    """Carries the stats bots publish from their own threads to whatever shows them, like the menu's dashboard.
+    Publishing is a single put on a lock-free queue, so it doesn't slow the bot down. The reader takes
+    everything published since it last looked at once, and only keeps each bot's latest stats"""
+
+    def __init__(self):
+        self._published = queue.SimpleQueue()
+
+    def publish(self, bot, stats: dict):
+        """Publish a snapshot of the bot's stats (see JKLMBot.stats)"""
+        self._published.put((bot, stats))
+
+    def drain(self) -> dict:
+        """Returns the latest stats of every bot which published since the last drain, by bot"""
+        latest = {}
+        while True:
+            try:
+                bot, stats = self._published.get_nowait()
+            except queue.Empty:
+                return latest
+            latest[bot] = stats
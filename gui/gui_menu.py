@@ -1,4 +1,6 @@
+import concurrent.futures
 import functools
+import queue
 import threading
 import tkinter as tk
 from tkinter import ttk
@@ -34,16 +36,65 @@ class ScrollableFrame(ttk.Frame):
         self.canvas.yview_scroll(-1 * int((event.delta / 120)), "units")
 
 
+class RunningBot:
+    """A bot started from the menu. The bot is created by one of the menu's workers, so it can be killed
+    before it exists, in which case whoever comes second (the worker or the kill) tears it down"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bot = None
+        self.killed = False
+        # The last status a worker sent, and the label showing it in the bot's window
+        self.status = "queued"
+        self.status_label = None
+        # The bot's row in the dashboard
+        self.row = None
+        self._lock = threading.Lock()
+
+    @property
+    def memory(self):
+        return self.bot.metrics.memory if self.bot is not None else 0
+
+    def attach(self, bot) -> bool:
+        """Set the created bot, returns False if it was killed in the meantime"""
+        with self._lock:
+            self.bot = bot
+            return not self.killed
+
+    def kill(self):
+        """Mark the bot as killed, returns the bot if it was already created"""
+        with self._lock:
+            self.killed = True
+            return self.bot
+
+
 class Menu:
     """A simple gui for the bot made in tkinter"""
 
+    # Threads which create and tear down bots, so the window never waits for chrome
+    WORKERS = 4
+    # Milliseconds between checks of the statuses the workers sent
+    STATUS_TIME = 100
+    # Milliseconds between repaints of the dashboard, every change since the last one is shown at once
+    DASHBOARD_TIME = 500
+    # The dashboard's columns, and the width of each
+    DASHBOARD_COLUMNS = {
+        "bot": 150,
+        "state": 130,
+        "syllable": 80,
+        "guesses": 70,
+        "rejected": 80,
+        "turn (ms)": 80,
+        "memory (MB)": 100,
+    }
+
     SLOW_PRESET = {
         "min_think_time": 100,
         "max_think_time": 400,
         "min_typing_speed": 20,
         "max_typing_speed": 60,
-        "word_length": 7,
-        "is_long": False,
+        "min_word_length": 0,
+        "max_word_length": 7,
         "mistake_percent": 12,
         "speedup": 0,
         "human": True,
@@ -53,8 +104,8 @@ class Menu:
         "max_think_time": 250,
         "min_typing_speed": 40,
         "max_typing_speed": 80,
-        "word_length": 7,
-        "is_long": False,
+        "min_word_length": 0,
+        "max_word_length": 7,
         "mistake_percent": 5,
         "speedup": 3,
         "human": True,
@@ -65,8 +116,8 @@ class Menu:
         "max_think_time": 0,
         "min_typing_speed": 999,
         "max_typing_speed": 999,
-        "word_length": 0,
-        "is_long": False,
+        "min_word_length": 0,
+        "max_word_length": 0,
         "mistake_percent": 0,
         "speedup": 0,
         "human": False,
@@ -83,14 +134,34 @@ class Menu:
         self.bot_settings = {}
         self.widgets = {}
         self.human = False
+        self.cover_alphabet = tk.BooleanVar(self.root)
+        self.language = tk.StringVar(self.root, "en")
         self.join_button = None
-        self.is_long = False
         self.check = None
         self.num_of_bots = 0
+        # The bots which are running (or starting), as RunningBots
+        self.bots = []
+        self.workers = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.WORKERS, thread_name_prefix="bot-worker"
+        )
+        # (RunningBot, status) pairs sent by the workers, shown by show_statuses
+        self.statuses = queue.Queue()
+        # Where the bots publish their stats, shown by repaint_dashboard
+        self.stats_channel = StatsChannel()
+        self.dashboard = None
+        # Headless lean browsers launched ahead of time, so joining doesn't wait for chrome to start
+        self.browser_pool = BrowserPool(size=2, headless=True, lean=True)
+        # How many bots can run, by the memory their browsers take
+        self.memory_budget = MemoryBudget()
+        # What the bots see in their games, kept for building better indices
+        self.outcome_store = OutcomeStore()
 
     def main(self):
         """Run the menu"""
+        self.browser_pool.start()
         self.create_screen()
+        self.show_statuses()
+        self.repaint_dashboard()
         self.run()
 
     def create_screen(self):
@@ -124,6 +195,28 @@ class Menu:
 
         frame = tk.Frame(self.frame.scrollable_frame)
 
+        label = tk.Label(master=frame, text="Language: ", font=label_font)
+        label.pack(side=tk.LEFT, anchor=tk.NW, padx=10)
+
+        language_menu = tk.OptionMenu(frame, self.language, *LANGUAGES)
+        language_menu.configure(font=(entry_font.name, 18))
+        language_menu.pack(side=tk.LEFT, anchor=tk.NW, padx=10)
+
+        info_button = tk.Button(
+            master=frame,
+            text="🛈",
+            font=(label_font.name, 18),
+            command=lambda: Mbox("The language of the room the bot joins."),
+            width=2,
+            height=1,
+            fg="dodger blue",
+        )
+        info_button.pack(side=tk.LEFT, anchor=tk.NW)
+
+        frame.pack(side=tk.TOP, anchor=tk.NW, pady=25)
+
+        frame = tk.Frame(self.frame.scrollable_frame)
+
         label = tk.Label(master=frame, text="Presets: ", font=label_font)
         label.pack(side=tk.LEFT, anchor=tk.NW)
 
@@ -197,25 +290,43 @@ class Menu:
             'The minimum and maximum time the bot will "think" before answering.\nMeasured in milliseconds',
         )
 
-        entry = self.bot_settings["word_length"] = self.create_label_and_entry(
-            "Only words below len: ",
+        self.create_range(
+            "Word length: ",
             label_font,
             entry_font,
+            "min_word_length",
+            "max_word_length",
             5,
             25,
-            tk.LEFT,
-            "The longest length of words the bot will use.\n"
-            'Check "only above len" to make it the shortest length it will use instead.',
-            percent=True,
-            words=True,
+            "The shortest and longest length of words the bot will use.\n"
+            "Leave 0 for no limit.",
         )
-        checkbutton = tk.Checkbutton(
-            master=entry.master,
-            font=entry_font,
-            text="Only above len",
-            command=lambda: self.change_long(),
+
+        frame = tk.Frame(self.frame.scrollable_frame)
+
+        check = tk.Checkbutton(
+            master=frame,
+            text="Cover the alphabet",
+            font=label_font,
+            variable=self.cover_alphabet,
         )
-        checkbutton.pack(padx=10)
+        check.pack(side=tk.LEFT, anchor=tk.NW)
+
+        info_button = tk.Button(
+            master=frame,
+            text="🛈",
+            font=(label_font.name, 18),
+            command=lambda: Mbox(
+                "Prefer words with letters the bot hasn't used yet.\n"
+                "Using every letter of the alphabet gives an extra life."
+            ),
+            width=2,
+            height=1,
+            fg="dodger blue",
+        )
+        info_button.pack(side=tk.LEFT, anchor=tk.NW)
+
+        frame.pack(side=tk.TOP, anchor=tk.NW, padx=5, pady=25)
 
         self.bot_settings["mistake_percent"] = self.create_label_and_entry(
             "Mistake Likelihood (%)",
@@ -255,10 +366,30 @@ class Menu:
 
         frame.pack(fill="both", side=tk.TOP, padx=15, pady=20, anchor=tk.NW)
 
+        self.create_dashboard(title_font)
+
         self.frame.pack()
 
-    def change_long(self):
-        self.is_long = not self.is_long
+    def create_dashboard(self, title_font):
+        """Creates a table of the running bots, with what each one is doing and how well"""
+        frame = tk.Frame(self.frame.scrollable_frame)
+
+        label = tk.Label(master=frame, text="Running Bots:", font=(title_font.name, 30))
+        label.pack(side=tk.TOP, padx=200)
+
+        dashboard = ttk.Treeview(
+            frame, columns=tuple(self.DASHBOARD_COLUMNS), show="headings", height=10
+        )
+        for column, width in self.DASHBOARD_COLUMNS.items():
+            dashboard.heading(column, text=column)
+            dashboard.column(column, width=width, anchor=tk.CENTER)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=dashboard.yview)
+        dashboard.configure(yscrollcommand=scrollbar.set)
+        dashboard.pack(side=tk.LEFT, fill="both")
+        scrollbar.pack(side=tk.LEFT, fill="y")
+        self.dashboard = dashboard
+
+        frame.pack(side=tk.TOP, padx=15, pady=20, anchor=tk.NW)
 
     def join_game(self):
         """Try to instantiate a requested bot and start it"""
@@ -281,43 +412,144 @@ class Menu:
             arg = bot_args[arg_name]
             if arg.isdigit():
                 bot_args[arg_name] = int(arg) / (60 if "typing" in arg_name else 100)
-                if arg_name == "word_length":
+                if "word_length" in arg_name:
                     bot_args[arg_name] *= 100
                     if 0 < bot_args[arg_name] < 3:
                         bot_args[arg_name] = 3
             elif arg_name == "bot_name":
                 bot_args[arg_name] = self.create_bot_name(arg)
 
-        # Performance reasons
-        if self.num_of_bots > 5:
-            Mbox("Can't have more than 5 bots running")
+        # Only start another bot if its browser fits in memory
+        usages = [running.memory for running in self.bots]
+        if not self.memory_budget.has_room(usages):
+            Mbox(
+                f"Not enough memory for another bot, the {self.num_of_bots} running bots "
+                f"take about {self.memory_budget.used(usages) // 2 ** 20} MB"
+            )
             return
 
-        # Start the bot
-        bot = JKLMBot(
+        # Start the bot in the background
+        bot_kwargs = dict(
             game_link=f"https://jklm.fun/{bot_args['game_code']}",
             bot_name=bot_args["bot_name"],
             think_time=(bot_args["min_think_time"], bot_args["max_think_time"]),
             typing_speed=(bot_args["min_typing_speed"], bot_args["max_typing_speed"]),
-            word_length=round(bot_args["word_length"]),
-            is_long=self.is_long,
+            word_length=(
+                round(bot_args["min_word_length"]),
+                round(bot_args["max_word_length"]),
+            ),
             mistake_chance=bot_args["mistake_percent"],
             speedup=bot_args["speedup"],
             humanlike=self.human,
             started_by_gui=True,
+            browser_pool=self.browser_pool,
+            language=self.language.get(),
+            outcome_store=self.outcome_store,
+            blacklist=shared_blacklist(f"blacklist_{self.language.get()}.bloom"),
+            strategy="coverage" if self.cover_alphabet.get() else "random",
+            lean_browser=True,
+            stats_channel=self.stats_channel,
+        )
+        running_bot = RunningBot(bot_args["bot_name"])
+        running_bot.row = self.dashboard.insert(
+            "", tk.END, values=(running_bot.name, running_bot.status)
         )
-        threading.Thread(target=bot.main).start()
+        self.workers.submit(self.launch_bot, running_bot, bot_kwargs)
         self.num_of_bots += 1
+        self.bots.append(running_bot)
 
         self.join_button["state"] = "disabled"
 
-        self.create_game_running_window(bot)
+        self.create_game_running_window(running_bot)
+
+    def launch_bot(self, running_bot, bot_kwargs):
+        """Create a bot and start it, on a worker thread"""
+        self.statuses.put((running_bot, "loading index"))
+        try:
+            # Bots share the index, so creating the bot only waits for it the first time
+            if not bot_kwargs.get("index_socket"):
+                load_words(bot_kwargs["language"])
+            self.statuses.put((running_bot, "starting browser"))
+            bot = JKLMBot(**bot_kwargs)
+        except Exception as error:
+            self.statuses.put((running_bot, f"failed: {error}"))
+            return
+
+        if not running_bot.attach(bot):
+            # Killed while it was starting, it never ran so its browser is given back here
+            bot.stop()
+            if bot.browser_pool is not None:
+                bot.browser_pool.release(bot.browser)
+            return
+
+        self.statuses.put((running_bot, "joining"))
+        threading.Thread(target=self.run_bot, args=(running_bot,)).start()
+
+    def run_bot(self, running_bot):
+        running_bot.bot.main()
+        self.statuses.put((running_bot, "stopped"))
+
+    def show_statuses(self):
+        """Show the latest status the workers sent for every bot, then check again later"""
+        latest = {}
+        while True:
+            try:
+                running_bot, status = self.statuses.get_nowait()
+            except queue.Empty:
+                break
+            latest[running_bot] = status
+
+        for running_bot, status in latest.items():
+            # The bot's window is gone once it's killed
+            if not running_bot.killed:
+                running_bot.status = status
+                running_bot.status_label["text"] = status
+                self.dashboard.set(running_bot.row, "state", status)
+
+        self.root.after(self.STATUS_TIME, self.show_statuses)
+
+    def repaint_dashboard(self):
+        """Show the stats the bots published since the last repaint, then repaint again later"""
+        published = self.stats_channel.drain()
+        if published:
+            running_bots = {
+                running_bot.bot: running_bot
+                for running_bot in self.bots
+                if running_bot.bot is not None
+            }
+            for bot, stats in published.items():
+                # Killed since it published
+                if bot not in running_bots:
+                    continue
+                running_bot = running_bots[bot]
+                values = self.dashboard_row(stats)
+                # Its last stats may arrive after the bot stopped
+                if running_bot.status == "stopped":
+                    values = (values[0], running_bot.status) + values[2:]
+                self.dashboard.item(running_bot.row, values=values)
+
+        self.root.after(self.DASHBOARD_TIME, self.repaint_dashboard)
+
+    @staticmethod
+    def dashboard_row(stats: dict):
+        """The dashboard's values for a bot's stats (see JKLMBot.stats)"""
+        latency = stats["turn_latency"]
+        memory = stats["memory"]
+        return (
+            stats["name"],
+            stats["state"],
+            stats["syllable"] or "-",
+            stats["guesses"],
+            f"{stats['reject_rate']:.0%}",
+            "-" if latency is None else f"{latency * 1000:.0f}",
+            f"{memory / 2 ** 20:.0f}" if memory else "-",
+        )
 
     def create_game_running_window(self, running_bot):
-        """A simple window to terminate the bot"""
+        """A simple window showing the bot's status, to terminate the bot"""
         window = tk.Toplevel(self.root)
         window.geometry("300x300")
-        window.title(f"running {running_bot.bot_name}")
+        window.title(f"running {running_bot.name}")
 
         title_font = tk_font.Font(
             family="Geneva", size=25, weight="bold", underline=True
@@ -328,9 +560,15 @@ class Menu:
         title = tk.Label(window, text="BOT IS RUNNING", font=title_font)
         title.pack(pady=10)
 
+        status_label = tk.Label(
+            window, text=running_bot.status, font=(label_font.name, 15)
+        )
+        status_label.pack(pady=5)
+        running_bot.status_label = status_label
+
         kill_button = tk.Button(
             master=window,
-            text=f"KILL {running_bot.bot_name.upper()}",
+            text=f"KILL {running_bot.name.upper()}",
             bg="red",
             font=(entry_font.name, 20),
             command=lambda: self.kill_bot(window, running_bot),
@@ -346,8 +584,13 @@ class Menu:
     def kill_bot(self, window, running_bot):
         """Terminate the bot and close all associated windows"""
         window.destroy()
-        running_bot.stop()
+        bot = running_bot.kill()
+        # Closing the browser takes a while, a bot which is still starting is torn down by its worker
+        if bot is not None:
+            self.workers.submit(bot.stop)
         self.num_of_bots -= 1
+        self.bots.remove(running_bot)
+        self.dashboard.delete(running_bot.row)
         self.join_button["state"] = "normal"
 
     @staticmethod
@@ -371,7 +614,7 @@ class Menu:
             self.bot_settings[widget].insert(0, preset[widget])
             # Enter values then disable the entry
             if bot:
-                if widget != "word_length":
+                if "word_length" not in widget:
                     self.bot_settings[widget]["state"] = "disabled"
 
     def create_range(
@@ -464,6 +707,9 @@ class Menu:
     def run(self):
         """Commands used after creating the menu screen"""
         self.root.mainloop()
+        self.workers.shutdown(wait=False)
+        self.browser_pool.close()
+        self.outcome_store.close()
 
 
 def main():
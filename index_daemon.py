@@ -0,0 +1,240 @@
+import argparse
+import os
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+
+from .coverage import CoverageSelector
+from .word_index import LANGUAGES, UsedWords, index_file, random_unused, shared_index
+
+# Protocol: the daemon greets every client with MAGIC and the index's word count, after that the client sends
+# requests and the daemon answers each one. Every message is its length followed by its payload
+MAGIC = b"BPIQ"
+HANDSHAKE = struct.Struct("<4sI")
+LENGTH = struct.Struct("<I")
+# A request is a count of queries, and a response the same count of results
+COUNT = struct.Struct("<H")
+# Combo length, min and max word length (0 for no bound), letters wanted (0 for a random word) and the count of
+# excluded word ids, followed by the combo and the excluded ids
+QUERY = struct.Struct("<BHHIH")
+EXCLUDED_ID = struct.Struct("<I")
+# Word id (NO_WORD if there isn't one), its letter mask and its length in bytes, followed by the word
+RESULT = struct.Struct("<IIH")
+NO_WORD = 0xFFFFFFFF
+# Random tries at finding an unused word before going over all of the combo's words
+RANDOM_PICKS = 8
+# Windows has no unix sockets, the daemon and its clients can't be used there but the module still imports
+UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+_UnixServer = getattr(
+    socketserver, "ThreadingUnixStreamServer", socketserver.ThreadingTCPServer
+)
+
+
+def default_socket_path(language: str = "en") -> str:
+    return os.path.join(tempfile.gettempdir(), f"bomb_party_index_{language}.sock")
+
+
+class IndexDaemon(_UnixServer):
+    """Serves word choices from a single copy of an index to every bot on the machine, over a unix socket.
+    A query is a combo, a word length window and the word ids to exclude, and is answered with a word and its
+    letter mask, so a bot doesn't need to load the index at all. Each client is served by its own thread"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, index_path: str, length_weight: float = 0):
+        _require_unix_sockets()
+        self.socket_path = socket_path
+        self.word_index = shared_index(index_path)
+        self.coverage = CoverageSelector(self.word_index, length_weight)
+        # A socket left behind by a daemon which didn't shut down cleanly
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _QueryHandler)
+
+    def answer(self, request, used_words: UsedWords) -> bytes:
+        """Returns the response to a request, using used_words (which is cleared) to hold each exclude set"""
+        (count,) = COUNT.unpack_from(request)
+        offset = COUNT.size
+        response = [COUNT.pack(count)]
+        for _ in range(count):
+            combo_len, min_len, max_len, needed, excluded = QUERY.unpack_from(
+                request, offset
+            )
+            offset += QUERY.size
+            combo = bytes(request[offset : offset + combo_len]).decode("utf-8")
+            offset += combo_len
+            for word_id in struct.unpack_from(f"<{excluded}I", request, offset):
+                used_words.add(word_id)
+            offset += excluded * EXCLUDED_ID.size
+
+            word_id = self.choose(combo, min_len, max_len, used_words, needed)
+            used_words.clear()
+            if word_id is None:
+                response.append(RESULT.pack(NO_WORD, 0, 0))
+                continue
+            word = self.word_index.word(word_id).encode("utf-8")
+            mask = self.word_index.letter_mask(word_id)
+            response.append(RESULT.pack(word_id, mask, len(word)) + word)
+        return b"".join(response)
+
+    def choose(self, combo, min_len, max_len, used_words, needed):
+        postings, start, end = self.word_index.window(combo, min_len, max_len or None)
+        if needed:
+            return self.coverage.choose(postings, start, end, used_words, needed)
+        return random_unused(postings, start, end, used_words, RANDOM_PICKS)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class _QueryHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        daemon = self.server
+        self.request.sendall(HANDSHAKE.pack(MAGIC, len(daemon.word_index)))
+        # Holds the exclude set of each query in turn
+        used_words = UsedWords(len(daemon.word_index))
+        while True:
+            try:
+                request = _receive(self.request)
+            except ConnectionError:
+                return
+            if request is None:
+                return
+            response = daemon.answer(request, used_words)
+            self.request.sendall(LENGTH.pack(len(response)) + response)
+
+
+class IndexClient:
+    """A connection to an IndexDaemon, which a bot uses in place of its WordIndex.
+    Only the words the daemon sent are known to the client, which is all the bot ever asks about"""
+
+    def __init__(self, socket_path: str = None):
+        _require_unix_sockets()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path or default_socket_path())
+        magic, self._word_count = HANDSHAKE.unpack(
+            _receive_exactly(self._socket, HANDSHAKE.size)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{socket_path} is not an index daemon")
+        # The words and letter masks the daemon sent, by id
+        self._words = {}
+        # Bots choose words ahead of time in the background, one request is sent at a time
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._word_count
+
+    def word(self, word_id: int) -> str:
+        return self._words[word_id][0]
+
+    def letter_mask(self, word_id: int) -> int:
+        return self._words[word_id][1]
+
+    def combos(self):
+        """The daemon doesn't list its combos, so there are none to choose answers for ahead of time"""
+        return []
+
+    def common_combos(self, count: int):
+        return []
+
+    def choose(self, combo: str, word_length=(0, 0), excluded=(), needed: int = 0):
+        """Returns the id of a word with the combo in the length window which isn't excluded, or None.
+        The word has the most needed letters if needed isn't 0, otherwise it's random"""
+        return self.query_many([(combo, word_length, excluded, needed)])[0]
+
+    def query_many(self, queries):
+        """Sends the queries, each one a combo, word length window, excluded word ids and needed letters, in a
+        single request. Returns the chosen word id (or None) of every query"""
+        request = [COUNT.pack(len(queries))]
+        for combo, (min_len, max_len), excluded, needed in queries:
+            combo = combo.encode("utf-8")
+            excluded = list(excluded)
+            request.append(
+                QUERY.pack(len(combo), min_len, max_len, needed, len(excluded))
+            )
+            request.append(combo)
+            request.append(struct.pack(f"<{len(excluded)}I", *excluded))
+        request = b"".join(request)
+
+        with self._lock:
+            self._socket.sendall(LENGTH.pack(len(request)) + request)
+            response = _receive(self._socket)
+        if response is None:
+            raise ConnectionError("The index daemon closed the connection")
+
+        word_ids = []
+        offset = COUNT.size
+        for _ in range(COUNT.unpack_from(response)[0]):
+            word_id, mask, word_len = RESULT.unpack_from(response, offset)
+            offset += RESULT.size
+            if word_id == NO_WORD:
+                word_ids.append(None)
+                continue
+            word = bytes(response[offset : offset + word_len]).decode("utf-8")
+            offset += word_len
+            self._words[word_id] = (word, mask)
+            word_ids.append(word_id)
+        return word_ids
+
+    def close(self):
+        self._socket.close()
+
+
+def _require_unix_sockets():
+    if not UNIX_SOCKETS:
+        raise OSError(
+            "The index daemon needs unix sockets, which this platform doesn't have"
+        )
+
+
+def _receive(connection):
+    """Returns the payload of the next message, or None if the other side closed the connection"""
+    header = _receive_exactly(connection, LENGTH.size, eof_ok=True)
+    if header is None:
+        return None
+    (length,) = LENGTH.unpack(header)
+    return _receive_exactly(connection, length)
+
+
+def _receive_exactly(connection, size: int, eof_ok: bool = False):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = connection.recv_into(view[received:])
+        if not count:
+            if eof_ok and not received:
+                return None
+            raise ConnectionError("The connection closed in the middle of a message")
+        received += count
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve word choices from a language's index to the bots on this machine"
+    )
+    parser.add_argument("--language", default="en", choices=LANGUAGES)
+    parser.add_argument("--index", help="the index file, by default the language's")
+    parser.add_argument("--socket", help="the socket path, by default in the temp dir")
+    parser.add_argument("--length-weight", type=float, default=0)
+    args = parser.parse_args()
+
+    socket_path = args.socket or default_socket_path(args.language)
+    with IndexDaemon(
+        socket_path, args.index or index_file(args.language), args.length_weight
+    ) as daemon:
+        print(f"Serving the {args.language} index on {socket_path}")
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
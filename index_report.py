@@ -0,0 +1,105 @@
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from .indexing import write_index
+from .metrics import percentile
+from .word_index import WordIndex
+
+
+def measure_load(load):
+    """Returns what load returned, the seconds it took and the bytes of python memory it left allocated"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    loaded = load()
+    elapsed = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return loaded, elapsed, allocated
+
+
+def selection_times(choose, combos, samples: int):
+    """Returns the seconds each of the given number of word choices for random combos took"""
+    times = []
+    for combo in random.choices(combos, k=samples):
+        start = time.perf_counter()
+        choose(combo)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def compare_formats(json_path: str, samples: int = 10000):
+    """Compares the combo dictionary json with the binary index, with plain and with compressed postings.
+    Returns the file size, load time, memory and word selection latencies of every format"""
+
+    def load_json():
+        with open(json_path, "r") as dict_file:
+            return json.load(dict_file)
+
+    words_dict, json_load, json_memory = measure_load(load_json)
+    combos = [combo for combo, (_, words) in words_dict.items() if words]
+
+    def choose_from_json(combo):
+        return random.choice(words_dict[combo][1])
+
+    report = {
+        "json": {
+            "file size": os.path.getsize(json_path),
+            "load time": json_load,
+            "python memory": json_memory,
+            "selection": selection_times(choose_from_json, combos, samples),
+        }
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, compress in (("index", False), ("compressed index", True)):
+            path = os.path.join(directory, f"{name}.bin")
+            write_index(words_dict, path, compress=compress)
+            word_index, index_load, index_memory = measure_load(lambda: WordIndex(path))
+
+            def choose_from_index(combo):
+                postings, start, end = word_index.window(combo)
+                return word_index.word(postings[random.randrange(start, end)])
+
+            report[name] = {
+                "file size": os.path.getsize(path),
+                "load time": index_load,
+                "python memory": index_memory,
+                "selection": selection_times(choose_from_index, combos, samples),
+            }
+            word_index.close()
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the size and speed of the combo json and the binary index"
+    )
+    parser.add_argument("--json", default="combo_dict_final.json")
+    parser.add_argument("--samples", type=int, default=10000, help="word choices to time")
+    args = parser.parse_args()
+
+    report = compare_formats(args.json, args.samples)
+    print(
+        f"{'format':<17} {'file (MB)':>10} {'load (ms)':>10} {'memory (MB)':>12} "
+        f"{'p50 (us)':>9} {'p99 (us)':>9}"
+    )
+    for name, measures in report.items():
+        print(
+            f"{name:<17} {measures['file size'] / 2 ** 20:>10.2f} "
+            f"{measures['load time'] * 1000:>10.2f} "
+            f"{measures['python memory'] / 2 ** 20:>12.2f} "
+            f"{percentile(measures['selection'], 50) * 1e6:>9.2f} "
+            f"{percentile(measures['selection'], 99) * 1e6:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,41 @@
+import bisect
 import concurrent
 import concurrent.futures
+import contextlib
+import gzip
+import heapq
 import itertools
 import json
+import os
+import sys
+import tempfile
+import time
+import unicodedata
+from array import array
 from string import ascii_lowercase
 
+try:
+    import numpy
+except ImportError:
+    # The ids in a patched index are moved one by one instead
+    numpy = None
+
+from .word_index import (
+    FLAG_VARINT_POSTINGS,
+    FORMAT_VERSION,
+    HEADER,
+    LANGUAGES,
+    MAGIC,
+    WordIndex,
+    decode_varint_deltas,
+    encode_varint_deltas,
+    index_file,
+    letter_mask,
+)
+
+# The words files the bot's words are taken from, in order of preference
+WORD_SOURCES = ("../best_words.txt", "../words-2.txt", "../words-3.txt")
+
 
 def add_word_len():
     """Adds a list to the start of each combo with the value at i
@@ -13,40 +45,150 @@ def add_word_len():
         words_dict = json.load(dict_file)
 
     for vowel in words_dict:
-        lens = [1 for _ in range(3, 21)]
-        current_len = 3
-        index = 0
         words_dict[vowel] = sorted(words_dict[vowel], key=len)
-        for word in words_dict[vowel]:
-            while current_len < len(word) < 20:
-                current_len += 1
-            index += 1
-            for i in range(current_len, 21):
-                lens[i - 3] = index
-        words_dict[vowel] = [lens, words_dict[vowel]]
+        words_dict[vowel] = [len_indices(words_dict[vowel]), words_dict[vowel]]
 
     with open("combo_dict_final.json", "w") as dict_file:
         json.dump(words_dict, dict_file)
 
 
-def get_words():
-    """Returns a list of all words the bot will use"""
-    # Open all words files
-    with open("../best_words.txt", "r") as words_file:
-        words_dict = words_file.read().split("\n")
+def len_indices(words):
+    """Gets a list of words sorted by length and returns a list with the value at i
+    representing the index at which the last word of i + 3 length appeared"""
+    lens = [1 for _ in range(3, 21)]
+    current_len = 3
+    index = 0
+    for word in words:
+        while current_len < len(word) < 20:
+            current_len += 1
+        index += 1
+        for i in range(current_len, 21):
+            lens[i - 3] = index
+    return lens
+
+
+def get_words(sources=WORD_SOURCES, **filters):
+    """Returns a list of all words the bot will use, read from the given words files (see stream_words)"""
+    return list(stream_words(sources, **filters))
+
+
+def stream_words(
+    sources,
+    alphabet=ascii_lowercase,
+    min_len=1,
+    max_len=None,
+    dedupe="set",
+    fold_accents=False,
+    chunk_size=1_000_000,
+    counts=None,
+):
+    """Yields the unique words of any number of words files (plain or gzip compressed), one at a time.
+    Every word is normalized (unicode NFKC, lower case and stripped, without accents if fold_accents is set),
+    and words with letters outside the alphabet or a length outside min_len - max_len are skipped.
+    Duplicates are removed with a set, or with an external sort if dedupe is "sort", which keeps at most
+    chunk_size words in memory and yields the words sorted.
+    How many words each source had, and how many of them were kept, are added to the counts dictionary"""
+    if dedupe not in ("set", "sort"):
+        raise ValueError(f"Unknown dedupe {dedupe}, expected set or sort")
+    counts = {} if counts is None else counts
+    alphabet = set(alphabet) if alphabet else None
+
+    def source_words(source):
+        source_counts = counts[source] = dict.fromkeys(
+            ("read", "filtered", "duplicates", "kept"), 0
+        )
+        for line in read_source(source):
+            source_counts["read"] += 1
+            word = normalize_word(line, fold_accents)
+            if (
+                len(word) < min_len
+                or max_len is not None
+                and len(word) > max_len
+                or alphabet is not None
+                and not alphabet.issuperset(word)
+            ):
+                source_counts["filtered"] += 1
+                continue
+            yield word
+
+    if dedupe == "set":
+        seen = set()
+        for source in sources:
+            for word in source_words(source):
+                if word in seen:
+                    counts[source]["duplicates"] += 1
+                else:
+                    seen.add(word)
+                    counts[source]["kept"] += 1
+                    yield word
+    else:
+        sources = list(sources)
+        with contextlib.ExitStack() as stack:
+            chunks = []
+            chunk = set()
+            for source_index, source in enumerate(sources):
+                for word in source_words(source):
+                    if (word, source_index) in chunk:
+                        counts[source]["duplicates"] += 1
+                        continue
+                    chunk.add((word, source_index))
+                    if len(chunk) >= chunk_size:
+                        chunks.append(stack.enter_context(_sorted_chunk(chunk)))
+                        chunk = set()
+            chunks.append(stack.enter_context(_sorted_chunk(chunk)))
+
+            # Equal words come one after the other, the one from the first source is kept
+            last_word = None
+            for word, source_index in heapq.merge(*map(_read_chunk, chunks)):
+                if word == last_word:
+                    counts[sources[source_index]]["duplicates"] += 1
+                else:
+                    counts[sources[source_index]]["kept"] += 1
+                    last_word = word
+                    yield word
 
-    with open("../words-2.txt", "r") as words_file:
-        words_2 = words_file.read().split("\n")
+    for source, source_counts in counts.items():
+        print(
+            f"{source}: {source_counts['read']} read, {source_counts['filtered']} filtered, "
+            f"{source_counts['duplicates']} duplicates, {source_counts['kept']} kept"
+        )
 
-    with open("../words-3.txt", "r") as words_file:
-        words_3 = words_file.read().split("\n")
 
-    # Add to the original word list the words from the other lists, without duplicates
-    for word in words_2 + words_3:
-        if word not in words_dict:
-            words_dict.append(word)
+def read_source(path):
+    """Yields the lines of a words file one at a time. Gzip compressed files are decompressed on the fly"""
+    with open(path, "rb") as source_file:
+        compressed = source_file.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as source_file:
+        yield from source_file
 
-    return list(set([word.strip() for word in words_dict]))
+
+def normalize_word(word, fold_accents=False):
+    """Returns the word stripped, lower case and in the unicode NFKC form, so equal words are equal strings"""
+    word = unicodedata.normalize("NFKC", word.strip()).casefold()
+    if fold_accents:
+        word = "".join(
+            letter
+            for letter in unicodedata.normalize("NFKD", word)
+            if not unicodedata.combining(letter)
+        )
+    return word
+
+
+@contextlib.contextmanager
+def _sorted_chunk(chunk):
+    """Writes the (word, source index) pairs to a temporary file, sorted"""
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as chunk_file:
+        for word, source_index in sorted(chunk):
+            chunk_file.write(f"{word}\t{source_index}\n")
+        chunk_file.seek(0)
+        yield chunk_file
+
+
+def _read_chunk(chunk_file):
+    for line in chunk_file:
+        word, source_index = line[:-1].rsplit("\t", 1)
+        yield word, int(source_index)
 
 
 def load_words():
@@ -57,58 +199,573 @@ def load_words():
     return words_dict
 
 
-def words_to_dict():
+def words_to_dict(workers=None):
     """Make a dictionary (json file) with 2 and 3 letter combinations as keys and a list of words they appear
-    in as values (in order to make word selecting be O(1))"""
-    # INDEX ALL 2 LETTER COMBINATIONS FIRST
-    words_dict = {}
+    in as values (in order to make word selecting be O(1)).
+    The words are already sorted by length with their length indices in front, so add_word_len isn't needed"""
     # Load the words
-    words = get_words()  # load_words()
-    # Generate list of all 2 letter combos
-    two_letters = ["".join(i) for i in itertools.product(ascii_lowercase, repeat=2)]
-    future_dicts = []
-    # Index the words inside the combos
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        for combo in two_letters:
-            future_dicts.append(executor.submit(index_combo, combo, words))
-            print(combo)
-
-    # Add indexed items to dict
-    for future_dict in concurrent.futures.as_completed(future_dicts):
-        words_dict.update(future_dict.result())
-
-    # Save the dictionary in a file
-    with open("combo_dict.json", "w") as combo_file:
-        json.dump(words_dict, combo_file, indent=4)
+    words = get_words()
+    words_dict = index_words(words, (2, 3), ascii_lowercase, workers)
+
+    # Keep every 2 and 3 letter combo, even ones no word contains
+    for size in (2, 3):
+        for combo in itertools.product(ascii_lowercase, repeat=size):
+            words_dict.setdefault("".join(combo), [])
 
-    # THEN USE THOSE INDEXED COMBINATIONS TO INDEX THE 3 LETTERS
-    # Generate list of all 3 letter combos
-    three_letters = ["".join(i) for i in itertools.product(ascii_lowercase, repeat=3)]
-    future_dicts = []
-    # Index the words inside the combos
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        for combo in three_letters:
-            # In order to reduce run time. "abc" will only appear in words which "bc" and "ab" appears in
-            matching_words = words_dict[combo[:2]] + words_dict[combo[1:]]
-            future_dicts.append(executor.submit(index_combo, combo, matching_words))
-            print(combo)
-
-    # Add indexed items to dict
-    for future_dict in concurrent.futures.as_completed(future_dicts):
-        words_dict.update(future_dict.result())
+    for combo in words_dict:
+        words_dict[combo] = [len_indices(words_dict[combo]), words_dict[combo]]
 
     update_word_dict(words_dict)
 
 
-def update_word_dict(words_dict):
+def index_words(words, ngram_sizes=(2, 3), alphabet=None, workers=None):
+    """Returns a dictionary with every combo (of the given sizes) which appears in the words as keys, and a list
+    of the words it appears in, sorted by length, as values (see index_word_ids)"""
+    all_words, combo_ids = index_word_ids(words, ngram_sizes, alphabet, workers)
+    return {
+        combo: [all_words[word_id] for word_id in word_ids]
+        for combo, word_ids in combo_ids.items()
+    }
+
+
+def index_word_ids(words, ngram_sizes=(2, 3), alphabet=None, workers=None):
+    """Returns the unique words sorted by length (then alphabetically), so a word's id is its position in them,
+    and a dictionary with every combo (of the given sizes) in the words as keys and an array of the sorted ids of
+    the words it appears in as values.
+    Each word is only walked once. The words are split into consecutive id ranges over a process pool, so every
+    shard's postings come out sorted and merging the shards is only concatenating them in order"""
+    start_time = time.perf_counter()
+    all_words = sorted(set(words), key=lambda word: (len(word), word))
+    workers = workers or os.cpu_count() or 1
+    shard_size = max(1, -(-len(all_words) // workers))
+    starts = range(0, len(all_words), shard_size)
+    shards = [all_words[start : start + shard_size] for start in starts]
+
+    combo_ids = {}
+    with contextlib.ExitStack() as stack:
+        # A single shard is indexed right here, a pool would only add pickling
+        mapper = map
+        if len(shards) > 1:
+            mapper = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(workers)
+            ).map
+        for shard_ids in mapper(
+            index_id_shard,
+            shards,
+            starts,
+            itertools.repeat(ngram_sizes),
+            itertools.repeat(alphabet),
+        ):
+            for combo, word_ids in shard_ids.items():
+                if combo in combo_ids:
+                    combo_ids[combo].extend(word_ids)
+                else:
+                    combo_ids[combo] = word_ids
+
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Indexed {len(all_words)} words into {len(combo_ids)} combos in {elapsed:.2f}s "
+        f"({len(all_words) / max(elapsed, 1e-9):.0f} words/sec)"
+    )
+    return all_words, combo_ids
+
+
+def index_id_shard(words, first_id, ngram_sizes, alphabet=None):
+    """Get a list of words whose ids start at first_id and return a dictionary with every combo (of the given
+    sizes) in them as keys and an array of the ids of the words the combo appears in, sorted, as values.
+    Combos with letters outside the alphabet are skipped"""
+    alphabet = set(alphabet) if alphabet else None
+    shard_ids = {}
+    for word_id, word in enumerate(words, first_id):
+        for size in ngram_sizes:
+            for i in range(len(word) - size + 1):
+                combo = word[i : i + size]
+                word_ids = shard_ids.get(combo)
+                if word_ids is not None:
+                    # The combo might appear more than once in the word
+                    if word_ids[-1] != word_id:
+                        word_ids.append(word_id)
+                elif alphabet is None or alphabet.issuperset(combo):
+                    shard_ids[combo] = array("I", [word_id])
+    return shard_ids
+
+
+def index_shard(words, ngram_sizes, alphabet=None):
+    """Get a list of words and return a dictionary with every combo (of the given sizes) in them as keys and a set
+    of the words the combo appears in as values. Combos with letters outside the alphabet are skipped"""
+    alphabet = set(alphabet) if alphabet else None
+    shard_dict = {}
+    for word in words:
+        for size in ngram_sizes:
+            for i in range(len(word) - size + 1):
+                combo = word[i : i + size]
+                if alphabet is None or alphabet.issuperset(combo):
+                    shard_dict.setdefault(combo, set()).add(word)
+    return shard_dict
+
+
+def update_word_dict(words_dict, path="combo_dict_final.json"):
     """Saves the combo dictionary in a file"""
-    with open("combo_dict_final.json", "w") as combo_file:
+    with atomic_open(path, "w") as combo_file:
         json.dump(words_dict, combo_file, indent=4)
 
 
-def index_combo(combo, words):
-    """Get a combo and list of all words and return a dictionary with the combo as key and list of all words
-    the combo appears in as a value"""
-    # Sort the words by length, in order to make further indexing by length easier.
-    words = sorted(words, key=len)
-    return {combo: list(set([word for word in words if combo in word]))}
+def update_index(language, added=(), removed=(), index_path=None, json_path=None):
+    """Adds and removes words from an existing binary index (made by build_index or write_index) without
+    rebuilding it. The words are spliced in between the existing ones, which are only moved, and the suffix
+    array is patched instead of sorted again. Only the combos the changed words appear in get new postings and
+    length counts. The index keeps its combo weights, compression and words which aren't in any combo.
+    The changed words' combos are taken with the alphabet and combo sizes of the index's language, the index
+    being the language's index file unless index_path is given.
+    If json_path is given the combo dictionary (made by words_to_dict) is updated as well"""
+    start_time = time.perf_counter()
+    settings = LANGUAGES[language]
+    index_path = index_path or index_file(language)
+    index = WordIndex(index_path)
+    try:
+        patched = _patch_index(
+            index, added, removed, settings["ngram_sizes"], settings["alphabet"]
+        )
+    finally:
+        index.close()
+    _save_index(index_path, *patched)
+
+    if json_path:
+        update_combo_dict(added, removed, json_path)
+
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Updated the index to {patched[0]} words in {patched[1]} combos in {elapsed:.2f}s"
+    )
+
+
+def _patch_index(index, added, removed, ngram_sizes, alphabet):
+    """Returns the word count, combo count, max length, sections and flags of the index with the words added and
+    removed (see update_index)"""
+    # The removed words which are in the index, and where every new word goes between the existing words.
+    # Like in update_combo_dict, words are removed before the others are added
+    added = set(added)
+    removed_ids = {}
+    for word in removed:
+        word_id = index.find_word(word)
+        if word_id >= 0 and word not in added:
+            removed_ids[word_id] = word
+    insertions = {}
+    for word in sorted(added, key=lambda word: (len(word), word)):
+        position = index.find_word(word)
+        if position < 0:
+            insertions.setdefault(-position - 1, []).append(word)
+
+    old_offsets = index.section("word_offsets")
+    old_blob = index.section("word_blob")
+    old_masks = index.section("letter_masks")
+    # The new id of every old word and the new offset of every byte of the old word blob, -1 if it was removed
+    new_ids = array("i", [-1]) * len(index)
+    new_positions = array("i", [-1]) * old_offsets[len(index)]
+    word_offsets = array("I", [0])
+    word_blob = bytearray()
+    letter_masks = array("I")
+    added_ids = {}
+    old_id = 0
+    for boundary in sorted({len(index), *removed_ids, *insertions}):
+        # The words up to the boundary stay as they are, only moved
+        if boundary > old_id:
+            start, end = old_offsets[old_id], old_offsets[boundary]
+            shift = len(word_blob) - start
+            new_id = len(letter_masks)
+            new_ids[old_id:boundary] = array(
+                "i", range(new_id, new_id + boundary - old_id)
+            )
+            new_positions[start:end] = array("i", range(start + shift, end + shift))
+            word_blob += old_blob[start:end]
+            word_offsets.extend(
+                map(shift.__add__, old_offsets[old_id + 1 : boundary + 1])
+            )
+            letter_masks.extend(old_masks[old_id:boundary])
+        for word in insertions.get(boundary, ()):
+            added_ids[word] = len(letter_masks)
+            word_blob += word.encode("utf-8") + b"\0"
+            word_offsets.append(len(word_blob))
+            letter_masks.append(letter_mask(word))
+        old_id = boundary + 1 if boundary in removed_ids else boundary
+
+    # How many words there are of every length, which gives the new length starts
+    old_starts = index.section("length_starts")
+    length_words = [
+        old_starts[length + 1] - old_starts[length]
+        for length in range(index.max_len + 1)
+    ]
+    longest = max(map(len, added_ids), default=0)
+    length_words += [0] * max(0, longest + 1 - len(length_words))
+    for word in removed_ids.values():
+        length_words[len(word)] -= 1
+    for word in added_ids:
+        length_words[len(word)] += 1
+    max_len = max(
+        (length for length, count in enumerate(length_words) if count), default=0
+    )
+    length_starts = array("I", itertools.accumulate([0] + length_words[: max_len + 1]))
+
+    def moved(table, values):
+        """Looks up every value in the table, leaving out the ones which were removed (-1)"""
+        if numpy is not None:
+            values = numpy.frombuffer(table, dtype=numpy.int32)[numpy.asarray(values)]
+            return array("I", values[values >= 0].astype(numpy.uint32).tobytes())
+        values = map(table.__getitem__, values)
+        if removed_ids:
+            values = filter((-1).__ne__, values)
+        return array("I", values)
+
+    # The combos of the new words, with the words' new ids
+    added_combos = {}
+    for word, word_id in added_ids.items():
+        for combo in index_id_shard([word], word_id, ngram_sizes, alphabet):
+            added_combos.setdefault(combo, []).append(word_id)
+
+    def length_counts_of(word_ids):
+        return [
+            bisect.bisect_left(word_ids, length_starts[length])
+            for length in range(max_len + 2)
+        ]
+
+    old_stride = index.max_len + 2
+    old_posting_offsets = index.section("posting_offsets")
+    old_postings = index.section("postings")
+    old_counts = index.section("length_counts")
+    old_weights = index.section("combo_weights")
+    combos = {}
+    for combo_id, combo in enumerate(index.combos()):
+        start, end = old_posting_offsets[combo_id], old_posting_offsets[combo_id + 1]
+        old_ids = old_postings[start:end]
+        if index.compressed:
+            old_ids = decode_varint_deltas(old_ids)
+        word_ids = moved(new_ids, old_ids)
+        changed = len(word_ids) != len(old_ids)
+        for word_id in added_combos.pop(combo, ()):
+            bisect.insort(word_ids, word_id)
+            changed = True
+
+        if changed and not word_ids:
+            # None of the combo's words are left
+            continue
+        if changed or max_len != index.max_len:
+            length_counts = length_counts_of(word_ids)
+        else:
+            length_counts = old_counts[
+                combo_id * old_stride : (combo_id + 1) * old_stride
+            ]
+        combos[combo] = (word_ids, array("I", length_counts), old_weights[combo_id])
+
+    for combo, word_ids in added_combos.items():
+        word_ids = array("I", word_ids)
+        combos[combo] = (word_ids, array("I", length_counts_of(word_ids)), 0)
+
+    combo_offsets = array("I", [0])
+    combo_blob = bytearray()
+    posting_offsets = array("I", [0])
+    postings = bytearray() if index.compressed else array("I")
+    length_counts = array("I")
+    combo_weights = array("I")
+    for combo in sorted(combos, key=lambda combo: combo.encode("utf-8")):
+        word_ids, counts, weight = combos[combo]
+        combo_blob += combo.encode("utf-8")
+        combo_offsets.append(len(combo_blob))
+        if index.compressed:
+            postings += encode_varint_deltas(word_ids)
+        else:
+            postings.extend(word_ids)
+        posting_offsets.append(len(postings))
+        length_counts.extend(counts)
+        combo_weights.append(weight)
+
+    # Move the old suffixes, then put the new words' suffixes where they belong between them
+    suffix_array = moved(new_positions, index.section("suffix_array"))
+    word_blob = bytes(word_blob)
+
+    def suffix(position):
+        return word_blob[position : word_blob.index(0, position)], position
+
+    new_suffixes = sorted(
+        suffix(position)
+        for word_id in added_ids.values()
+        for position in range(word_offsets[word_id], word_offsets[word_id + 1] - 1)
+        # A combo can't start in the middle of a utf-8 character
+        if word_blob[position] & 0xC0 != 0x80
+    )
+    patched_suffixes = array("I")
+    last = 0
+    for key in new_suffixes:
+        # Equal suffixes are ordered by position, like when the suffix array is sorted
+        low, high = last, len(suffix_array)
+        while low < high:
+            middle = (low + high) // 2
+            if suffix(suffix_array[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        patched_suffixes.extend(suffix_array[last:low])
+        patched_suffixes.append(key[1])
+        last = low
+    patched_suffixes.extend(suffix_array[last:])
+
+    sections = (
+        word_offsets,
+        word_blob,
+        length_starts,
+        combo_offsets,
+        combo_blob,
+        posting_offsets,
+        postings,
+        length_counts,
+        patched_suffixes,
+        letter_masks,
+        combo_weights,
+    )
+    flags = FLAG_VARINT_POSTINGS if index.compressed else 0
+    return len(letter_masks), len(combos), max_len, sections, flags
+
+
+def update_combo_dict(added=(), removed=(), json_path="combo_dict_final.json"):
+    """Adds and removes words from an existing combo dictionary (made by words_to_dict).
+    Only the combos the changed words appear in are re-sorted"""
+    with open(json_path, "r") as dict_file:
+        words_dict = json.load(dict_file)
+
+    changed_combos = set()
+    for word in removed:
+        for combo in index_shard([word], (2, 3), ascii_lowercase):
+            if combo in words_dict and word in words_dict[combo][1]:
+                words_dict[combo][1].remove(word)
+                changed_combos.add(combo)
+
+    for word in added:
+        for combo in index_shard([word], (2, 3), ascii_lowercase):
+            combo_words = words_dict.setdefault(combo, [[], []])[1]
+            if word not in combo_words:
+                combo_words.append(word)
+                changed_combos.add(combo)
+
+    # Only the changed combos need to be re-sorted and have their length indices updated
+    for combo in changed_combos:
+        combo_words = sorted(words_dict[combo][1], key=lambda word: (len(word), word))
+        words_dict[combo] = [len_indices(combo_words), combo_words]
+
+    update_word_dict(words_dict, json_path)
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode="w"):
+    """Opens a temporary file next to the given path, which only replaces it once it's fully written.
+    A crash in the middle of writing leaves the original file as it was"""
+    directory, name = os.path.split(os.path.abspath(path))
+    temp_fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory)
+    try:
+        with os.fdopen(temp_fd, mode) as temp_file:
+            yield temp_file
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def json_to_index(
+    json_path="combo_dict_final.json", index_path="combo_index_en.bin"
+):
+    """Converts an existing combo dictionary (json file) to the binary index format"""
+    with open(json_path, "r") as dict_file:
+        words_dict = json.load(dict_file)
+
+    write_index(words_dict, index_path)
+
+
+def build_index(
+    words,
+    path="combo_index_en.bin",
+    ngram_sizes=(2, 3),
+    alphabet=None,
+    compress=False,
+    outcomes=None,
+):
+    """Builds the binary index straight from a list of words.
+    Only combos which actually appear in a word get postings, any other combo (of any length) is found in the
+    suffix array instead.
+    If an OutcomeStore is given, words the game rejected (see OutcomeStore.rejected_words) are left out and the
+    combos are weighted by how often the game showed them"""
+    combo_weights = None
+    if outcomes is not None:
+        rejected = outcomes.rejected_words()
+        words = [word for word in words if word not in rejected]
+        combo_weights = outcomes.syllable_counts()
+    all_words, combo_ids = index_word_ids(words, ngram_sizes, alphabet)
+    write_id_index(all_words, combo_ids, path, compress, combo_weights)
+
+
+def build_language_index(language, sources, path=None, outcomes=None, **filters):
+    """Builds the index of a single language from its words files, with the language's alphabet and combo sizes.
+    Every language has an index file of its own, so bots only load the languages they play in"""
+    settings = LANGUAGES[language]
+    words = get_words(sources, alphabet=settings["alphabet"], **filters)
+    build_index(
+        words,
+        path or index_file(language),
+        settings["ngram_sizes"],
+        settings["alphabet"],
+        outcomes=outcomes,
+    )
+
+
+def write_index(
+    words_dict, path="combo_index_en.bin", words=(), compress=False, combo_weights=None
+):
+    """Saves the combo dictionary as a binary index which the bot memory maps (see word_index.py for the layout).
+    Every word is stored once, and the combos only keep the ids of the words they appear in.
+    Words which aren't in any combo can be added with the words argument.
+    If compress is set the ids are stored as delta encoded varints, which makes the postings several times smaller
+    but has them decoded on their first use. combo_weights is a dictionary of how often each combo comes up"""
+    combos = {}
+    for combo, combo_words in words_dict.items():
+        # Combos which went through add_word_len have the length indices before the words
+        if isinstance(combo_words, list) and combo_words and isinstance(combo_words[0], list):
+            combo_words = combo_words[1]
+        combos[combo] = combo_words
+
+    # Sort the words by length, so the ids (and therefore every combo's postings) are sorted by length as well
+    all_words = sorted(
+        {word for combo_words in combos.values() for word in combo_words}.union(words),
+        key=lambda word: (len(word), word),
+    )
+    word_ids = {word: word_id for word_id, word in enumerate(all_words)}
+    combo_ids = {
+        combo: array("I", sorted({word_ids[word] for word in combo_words}))
+        for combo, combo_words in combos.items()
+    }
+    write_id_index(all_words, combo_ids, path, compress, combo_weights)
+
+
+def write_id_index(
+    all_words, combo_ids, path="combo_index_en.bin", compress=False, combo_weights=None
+):
+    """Saves words sorted by length (then alphabetically) and the sorted ids of every combo's words as a binary
+    index, see write_index"""
+    combo_weights = combo_weights or {}
+    combos = {combo.encode("utf-8"): word_ids for combo, word_ids in combo_ids.items()}
+    max_len = len(all_words[-1]) if all_words else 0
+
+    word_offsets = array("I", [0])
+    word_blob = bytearray()
+    length_starts = array("I", [0] * (max_len + 2))
+    current_len = 0
+    for word_id, word in enumerate(all_words):
+        # Mark the first word of every length up to this one
+        while current_len <= len(word):
+            length_starts[current_len] = word_id
+            current_len += 1
+        word_blob += word.encode("utf-8") + b"\0"
+        word_offsets.append(len(word_blob))
+    for length in range(current_len, max_len + 2):
+        length_starts[length] = len(all_words)
+
+    combo_offsets = array("I", [0])
+    combo_blob = bytearray()
+    posting_offsets = array("I", [0])
+    postings = bytearray() if compress else array("I")
+    length_counts = array("I")
+    for combo in sorted(combos):
+        combo_blob += combo
+        combo_offsets.append(len(combo_blob))
+        word_ids = combos[combo]
+        if compress:
+            postings += encode_varint_deltas(word_ids)
+        else:
+            postings.extend(word_ids)
+        posting_offsets.append(len(postings))
+
+        # How many of the combo's words are shorter than each length, the ids are sorted by length
+        length_counts.extend(
+            bisect.bisect_left(word_ids, length_starts[length])
+            for length in range(max_len + 2)
+        )
+
+    sections = (
+        word_offsets,
+        word_blob,
+        length_starts,
+        combo_offsets,
+        combo_blob,
+        posting_offsets,
+        postings,
+        length_counts,
+        _suffix_array(word_blob, word_offsets),
+        array("I", map(letter_mask, all_words)),
+        array(
+            "I",
+            [combo_weights.get(str(combo, "utf-8"), 0) for combo in sorted(combos)],
+        ),
+    )
+    _save_index(
+        path,
+        len(all_words),
+        len(combos),
+        max_len,
+        sections,
+        FLAG_VARINT_POSTINGS if compress else 0,
+    )
+
+
+def _save_index(path, word_count, combo_count, max_len, sections, flags=0):
+    """Writes the index's header and sections (in the order of word_index.SECTIONS) to the path"""
+    sections = [_section_bytes(section) for section in sections]
+    with atomic_open(path, "wb") as output_file:
+        output_file.write(
+            _index_header(word_count, combo_count, max_len, sections, flags)
+        )
+        for section in sections:
+            output_file.write(section)
+
+
+def _suffix_array(word_blob, word_offsets):
+    """Returns the offset of every character in the word blob, sorted by the rest of the word from there"""
+    word_blob = bytes(word_blob)
+    # Bucket the suffixes by their first byte, so only one bucket's sort keys are in memory at a time
+    buckets = {}
+    for word_id in range(len(word_offsets) - 1):
+        # Don't include the null byte at the end of the word
+        for position in range(word_offsets[word_id], word_offsets[word_id + 1] - 1):
+            # A combo can't start in the middle of a utf-8 character
+            if word_blob[position] & 0xC0 != 0x80:
+                buckets.setdefault(word_blob[position], array("I")).append(position)
+
+    suffix_array = array("I")
+    for first_byte in sorted(buckets):
+        suffix_array.extend(
+            sorted(
+                buckets.pop(first_byte),
+                key=lambda position: word_blob[position : word_blob.index(0, position)],
+            )
+        )
+    return suffix_array
+
+
+def _index_header(word_count, combo_count, max_len, sections, flags=0):
+    """Returns the binary index header, containing the counts and the offset of every section"""
+    offsets = []
+    offset = HEADER.size
+    for section in sections:
+        offsets.append(offset)
+        offset += len(section)
+
+    return HEADER.pack(
+        MAGIC, FORMAT_VERSION, flags, word_count, combo_count, max_len, *offsets
+    )
+
+
+def _section_bytes(section):
+    """Returns a section of the binary index as little endian bytes, padded to a multiple of 4"""
+    if isinstance(section, array):
+        if sys.byteorder != "little":
+            section = array(section.typecode, section)
+            section.byteswap()
+        section = section.tobytes()
+    return bytes(section) + bytes(-len(section) % 4)
@@ -1,12 +1,10 @@
 import os
 import random
 import sys
+import threading
 import time
 from typing import Tuple
 
-import json
-from string import ascii_lowercase
-
 import selenium.common.exceptions
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -15,9 +13,92 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from . import page_scripts
+from .answer_cache import AnswerCache
+from .browser_memory import browser_rss
+from .coverage import CoverageSelector, LetterCoverage
+from .indexing import json_to_index
+from .metrics import TurnMetrics
+from .word_index import UsedWords, index_file, random_unused, shared_index
+
+# Held while an old combo dictionary is converted to the index, so only one bot converts it
+_convert_lock = threading.Lock()
+
+# Chrome arguments of the lean browser: no gpu, extensions or background work, and the game's iframe in the
+# page's process (no site isolation), so there are fewer processes and the request blocking covers it
+LEAN_CHROME_ARGUMENTS = (
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-component-update",
+    "--disable-dev-shm-usage",
+    "--no-first-run",
+    "--mute-audio",
+    "--blink-settings=imagesEnabled=false",
+    "--disable-site-isolation-trials",
+    "--disable-features=IsolateOrigins,site-per-process,Translate,MediaRouter",
+    "--renderer-process-limit=2",
+)
+# Content the lean browser doesn't load at all
+LEAN_CHROME_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.default_content_setting_values.notifications": 2,
+}
+# Requests the lean browser blocks: images, fonts, sounds and anything which isn't part of the game
+BLOCKED_URLS = (
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.mp3",
+    "*.ogg",
+    "*.wav",
+    "*.mp4",
+    "*.webm",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googlesyndication.com*",
+    "*doubleclick.net*",
+    "*adservice.google.*",
+)
+
+
+class BotStopped(Exception):
+    """The bot was killed while it was waiting for the game"""
+
 
 class JKLMBot:
     HOUR = 60 * 60 * 60
+    # Random tries at finding an unused word before going over all of the combo's words
+    RANDOM_PICKS = 8
+    # Seconds to wait for an answer to be accepted before guessing again
+    RETRY_TIME = 0.2
+    # Different games a word has to be rejected in, without the game saying why, before it's blacklisted
+    BLACKLIST_GAMES = 3
+    # Most seconds a killed bot keeps waiting for the game
+    STOP_CHECK_TIME = 1
+    # The states of the bot's session in the room, see play
+    JOINING = "joining"
+    LOBBY = "lobby"
+    PLAYING = "playing"
+    GAME_OVER = "game over"
+    # random - any unused word, coverage - the unused word with the most letters we still need for an extra life
+    STRATEGIES = ("random", "coverage")
+    BOT_LINK = "https://tinyurl.com/bomb-party-bot"
+    SHOUTOUT = (
+        f"Hello! I am a bot made by hadar759\nYou can download me over at "
+        f"{BOT_LINK} and run more bots like me :D\nHave fun and enjoy this bot!"
+    )
 
     def __init__(
         self,
@@ -27,23 +108,43 @@ class JKLMBot:
         typing_speed: Tuple[int, int],
         mistake_chance: int,
         speedup: int,
-        word_length: int = 0,
-        is_long: bool = False,
+        word_length: Tuple[int, int] = (0, 0),
         humanlike: bool = True,
         started_by_gui: bool = False,
+        browser_pool=None,
+        metrics_sinks=(),
+        strategy: str = "random",
+        length_weight: float = 0,
+        language: str = "en",
+        outcome_store=None,
+        blacklist=None,
+        index_socket: str = None,
+        lean_browser: bool = False,
+        stats_channel=None,
     ):
-        # Indexed combos and words
-        self.words_dict = load_words()
+        # The language of the room, which decides the words the bot uses
+        self.language = language
+        # The socket of an IndexDaemon serving the language's index, the bot loads the index itself if None
+        self.index_socket = index_socket
+        # Indexed combos and words, shared between all bots in the process playing in the same language.
+        # In client mode the daemon chooses the words, and this only knows the words it sent
+        if index_socket:
+            # Only imported when it's used, the daemon isn't available on every platform
+            from .index_daemon import IndexClient
+
+            self.word_index = IndexClient(index_socket)
+        else:
+            self.word_index = load_words(language)
+        # Ids of the words we've already used this game
+        self.used_words = UsedWords(len(self.word_index))
         self.game_link = game_link
         self.bot_name = bot_name
         # 2 values representing a range of possible time the bot will think before answering
         self.think_time = think_time
         # 2 values representing a range of possible time between each letter the bot will type
         self.typing_speed = typing_speed
-        # The upper or lower bound of word length the bot will use
+        # 2 values representing the range of word lengths the bot will use, 0 for no bound
         self.word_length = word_length
-        # Whether the bound is lower (long - only use words above that length) or upper
-        self.is_long = is_long
         # Chance of the bot making a typo each keystroke
         self.mistake_chance = mistake_chance
         # Decimal representing a speed increase as a % of current speed each correct guess
@@ -52,120 +153,441 @@ class JKLMBot:
         self.humanlike = humanlike
         # Correct guesses we've made
         self.guesses = 0
+        # Timings of the bot's turns
+        self.metrics = TurnMetrics(bot_name, sinks=metrics_sinks)
+        # How the bot chooses between a combo's words, one of STRATEGIES
+        if strategy not in self.STRATEGIES:
+            raise ValueError(
+                f"Unknown strategy {strategy}, expected one of {self.STRATEGIES}"
+            )
+        self.strategy = strategy
+        # The letters we still need for an extra life, and the letters of the answer we're waiting on
+        self.letters = LetterCoverage()
+        self.answer_mask = 0
+        # The combo and word of the answer we're waiting on
+        self.answer = None
+        # The word the game last rejected and why, when the game says
+        self.rejection = None
+        # Words other players used this game
+        self.played_words = set()
+        # The games (by games_played) words were rejected in without a reason, by word
+        self.rejected_games = {}
+        # Where the bot records its answers and the syllables it sees, if anywhere
+        self.outcome_store = outcome_store
+        # Words the game rejected before, which the bot won't try again
+        self.blacklist = blacklist
+        # In client mode the daemon chooses by coverage (with its own length weight)
+        if index_socket:
+            self.coverage = None
+        else:
+            self.coverage = CoverageSelector(self.word_index, length_weight)
+        # Answers chosen ahead of time, refilled in the background
+        self.answers = AnswerCache(self.choose_word_id, self.word_index, self.used_words)
+        # Set once the bot is killed, so it stops waiting for the game
+        self.stopped = False
+        # Where the bot publishes its stats whenever they change, if anywhere
+        self.stats_channel = stats_channel
+        # The last syllable the game showed, on anyone's turn
+        self.syllable = None
+        # Whether we answered and are waiting to see if the answer was accepted
+        self.guessing = False
+        # Where the bot is in its session in the room, see play
+        self.state = self.JOINING
+        self.games_played = 0
+        # Elements which were already located, by xpath
+        self.elements = {}
+        # Where the bot leases its browser from, a new browser is launched for the bot if None
+        self.browser_pool = browser_pool
+        # Whether a browser launched for the bot is the lean one, see launch_browser
+        self.lean_browser = lean_browser
         # Create a new "invisible" (headless) chrome browser
-        options = Options()
-        if started_by_gui:
-            options.add_argument("--headless")
-        self.browser = webdriver.Chrome(
-            executable_path=resource_path(r"project\chromedriver.exe"),
-            chrome_options=options,
-        )
+        self.browser = self.start_browser(headless=started_by_gui)
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state: str):
+        self._state = state
+        self.publish_stats()
+
+    def stats(self) -> dict:
+        """Returns a snapshot of what the bot is doing and how well"""
+        return {
+            "name": self.bot_name,
+            "state": self.state,
+            "syllable": self.syllable,
+            "guesses": self.guesses,
+            "reject_rate": self.metrics.reject_rate(),
+            "turn_latency": self.metrics.last_duration("turn"),
+            "memory": self.metrics.memory,
+        }
+
+    def publish_stats(self):
+        if self.stats_channel is not None:
+            self.stats_channel.publish(self, self.stats())
+
+    def start_browser(self, headless: bool):
+        """Launch the chrome browser the bot plays in, or lease a warm one from the pool"""
+        if self.browser_pool is not None:
+            return self.browser_pool.lease()
+        return launch_browser(headless, self.lean_browser)
+
+    def measure_memory(self):
+        """Measure the memory of the bot's browser and keep it in the bot's metrics.
+        Returns the bytes it takes, or None if it can't be measured"""
+        memory = self.browser_memory()
+        self.metrics.memory = memory or 0
+        self.publish_stats()
+        return memory
+
+    def browser_memory(self):
+        """Returns the bytes the bot's browser takes, or None if it can't be measured"""
+        return browser_rss(self.browser)
 
     def main(self):
-        self.enter_room()
-        self.join_game(first=True)
+        self.answers.start()
         try:
+            self.enter_room()
             self.play()
-        # The bot was kicked
+        # The bot was kicked or killed
         except (
             selenium.common.exceptions.StaleElementReferenceException,
             selenium.common.exceptions.InvalidSessionIdException,
+            selenium.common.exceptions.NoSuchWindowException,
+            BotStopped,
         ):
             pass
+        finally:
+            self.answers.stop()
+            # Give the browser back only once we're done with it
+            if self.browser_pool is not None:
+                self.browser_pool.release(self.browser)
 
     def play(self):
-        """The bot's logic while playing a match"""
-        # Wait until game start
-        ongoing_round_element = WebDriverWait(self.browser, self.HOUR).until(
-            EC.visibility_of_element_located((By.CLASS_NAME, "round"))
-        )
-        while not ongoing_round_element.is_displayed():
-            time.sleep(1)
+        """The bot's logic while in the room, playing matches one after the other.
+        It goes through the session's states in a loop, so it can keep playing for as long as the room is open.
+        What the game's events mean for the bot is decided by handle_event, this only talks to the browser"""
+        self.state = self.JOINING
+        self.join_game(first=True)
 
-        # The box to enter the guesses in
-        enter_box = WebDriverWait(self.browser, self.HOUR).until(
-            EC.visibility_of_element_located(
-                (By.XPATH, "/html/body/div[2]/div[3]/div[2]/div[2]/form/input")
+        # Watch the game for turns instead of polling it, the watcher stays between games
+        self.browser.set_script_timeout(self.HOUR)
+        self.browser.execute_script(page_scripts.INSTALL_WATCHER)
+
+        self.state = self.LOBBY
+        self.measure_memory()
+        while True:
+            if self.state == self.JOINING:
+                self.join_game()
+                self.state = self.LOBBY
+
+            # Give the game some time to accept the answer, have it reguess if it wasn't
+            event = self.next_event(self.RETRY_TIME if self.guessing else None)
+            if event is None:
+                event = dict(
+                    self.browser.execute_script(page_scripts.WATCHER_STATE),
+                    type="timeout",
+                )
+            combo = self.handle_event(event)
+            if combo is not None:
+                self.take_turn(combo, self.answer_box())
+
+    def start_game(self):
+        """A new game started, every word and letter can be used again"""
+        self.state = self.PLAYING
+        self.used_words.clear()
+        self.played_words.clear()
+        self.letters.reset()
+        if self.strategy == "coverage":
+            self.answers.clear()
+        self.guessing = False
+
+    def handle_event(self, event):
+        """Updates the bot for an event of the game watcher, or a "timeout" event with the watcher's state if
+        none came in RETRY_TIME while guessing. Shared by every runtime, which only does the browser's part.
+        Returns the combo to take a turn on, or None"""
+        if self.state == self.LOBBY:
+            # Wait until game start
+            if event["type"] == "round_start":
+                self.start_game()
+            return None
+
+        if event["type"] == "timeout":
+            # The turn ended after the timeout, and its turn_end will come once we stopped guessing
+            if self.guessing and not event["turn"]:
+                self.turn_moved_on()
+            self.guessing = event["turn"]
+            if self.guessing:
+                # The answer wasn't accepted, guessing again is a new turn
+                self.answered(accepted=False)
+                self.metrics.start_turn()
+                self.metrics.mark("combo_read")
+                return event["syllable"]
+
+        # It is our turn
+        elif event["type"] == "turn":
+            # A new syllable while we're guessing means the last answer was accepted, unless the game said no
+            if self.guessing:
+                self.turn_moved_on(event["time"] / 1000)
+            self.metrics.start_turn(event["time"] / 1000)
+            self.metrics.mark("combo_read")
+            self.record_syllable(event["syllable"])
+            self.guessing = True
+            return event["syllable"]
+
+        # Not our turn
+        elif event["type"] == "turn_end":
+            if self.guessing:
+                self.turn_moved_on(event["time"] / 1000)
+            self.guessing = False
+
+        # Another player's turn
+        elif event["type"] == "syllable":
+            self.record_syllable(event["syllable"])
+
+        # The game said why it rejected our answer
+        elif event["type"] == "rejected":
+            self.rejection = (event["word"], event["reason"])
+
+        elif event["type"] == "played_word":
+            self.record_played_word(event["syllable"], event["word"])
+
+        elif event["type"] == "round_end":
+            self.state = self.GAME_OVER
+            self.guessing = False
+            self.games_played += 1
+            # The browser grows over a game, measure it between games
+            self.measure_memory()
+            self.state = self.JOINING
+        return None
+
+    def answer_box(self):
+        """The box to enter the guesses in"""
+        return self.locate(page_scripts.ANSWER_PATH, self.HOUR)
+
+    def next_event(self, timeout: float = None):
+        """Blocks until the game watcher reports an event and returns it.
+        Returns None if a timeout (in seconds) is given and no event came in that time"""
+        if timeout is not None:
+            return self.browser.execute_async_script(
+                page_scripts.WAIT_FOR_EVENT, timeout * 1000
             )
-        )
 
-        # The letters the game wants
-        combo_element = WebDriverWait(self.browser, self.HOUR).until(
-            EC.visibility_of_element_located(
-                (By.XPATH, "/html/body/div[2]/div[2]/div[2]/div[2]/div")
+        # Wait in short parts, so a killed bot doesn't keep its browser busy
+        while not self.stopped:
+            event = self.browser.execute_async_script(
+                page_scripts.WAIT_FOR_EVENT, self.STOP_CHECK_TIME * 1000
             )
+            if event is not None:
+                return event
+        raise BotStopped()
+
+    def wait_until(self, condition, timeout: float):
+        """Waits until the expected condition is met and returns its value, unless the bot is killed"""
+
+        def until_stopped(browser):
+            if self.stopped:
+                raise BotStopped()
+            return condition(browser)
+
+        return WebDriverWait(self.browser, timeout).until(until_stopped)
+
+    def locate(self, xpath: str, timeout: float, clickable: bool = False):
+        """Returns the element at the xpath, once it's clickable if asked.
+        The element is only looked up the first time, and again if it stops being valid"""
+        element = self.elements.get(xpath)
+        if element is not None:
+            try:
+                if not clickable or self.wait_until(
+                    lambda browser: element.is_displayed() and element.is_enabled(),
+                    timeout,
+                ):
+                    return element
+            # The game replaced the element
+            except selenium.common.exceptions.StaleElementReferenceException:
+                pass
+
+        if clickable:
+            condition = EC.element_to_be_clickable((By.XPATH, xpath))
+        else:
+            condition = EC.presence_of_element_located((By.XPATH, xpath))
+        element = self.elements[xpath] = self.wait_until(condition, timeout)
+        return element
+
+    def take_turn(self, combo, enter_box):
+        """Choose a word for the given combo and send it to the game"""
+        # Make it so the bot appears to think
+        if self.humanlike:
+            time.sleep(self.thinking_time())
+        # Send the answer to the game
+        self.answer_sent(self.enter_answer(self.prepare_answer(combo), enter_box))
+
+    def thinking_time(self) -> float:
+        """Seconds a humanlike bot waits before answering, shorter the more it guessed"""
+        return max(
+            0.0,
+            random.randint(self.think_time[0] * 100, self.think_time[1] * 100) / 100
+            - self.guesses * self.think_time[0] * self.speedup,
         )
 
-        # Variables to help the bot make less mistakes
-        last_combo = ""
-        last_guess_time = time.time()
-
-        # While game is running
-        while ongoing_round_element.is_displayed():
-            # It is our turn
-            if enter_box.is_displayed():
-                # Make it so the bot appears to think
-                if self.humanlike:
-                    time.sleep(
-                        max(
-                            0.0,
-                            random.randint(
-                                self.think_time[0] * 100, self.think_time[1] * 100
-                            )
-                            / 100
-                            - self.guesses * self.think_time[0] * self.speedup,
-                        )
-                    )
-
-                # Get the wanted letters
-                combo = combo_element.text.lower()
-
-                # Make sure the bot isn't entering several values very fast, and also have it reguess if the guess was incorrect
-                if enter_box.is_displayed() and (
-                    combo != last_combo or time.time() - last_guess_time > 0.2
-                ):
-                    chosen_word = self.word_from_combo(combo)
-                    last_combo = combo
-                    valid_words = self.words_dict[combo][1]
-                    # In order to not reuse words
-                    try:
-                        valid_words.remove(chosen_word)
-                        self.words_dict[combo][1] = valid_words
-                    except ValueError:
-                        pass
-                    # Send the answer to the game
-                    self.enter_answer(chosen_word, enter_box)
-                    last_guess_time = time.time()
-                    self.guesses += 1
-
-            # Not our turn
-            else:
-                last_combo = ""
-
-        # Game ended, join the next one
-        self.join_game()
-
-        # Play again
-        self.play()
+    def prepare_answer(self, combo) -> str:
+        """Choose the word to answer the combo with and remember it as the answer we're waiting on"""
+        word_id = self.select_answer(combo)
+        if word_id is None:
+            chosen_word = "No idea :("
+            self.answer_mask = 0
+        else:
+            self.answer_mask = self.word_index.letter_mask(word_id)
+            chosen_word = self.word_index.word(word_id)
+            # In order to not reuse words
+            self.used_words.add(word_id)
+        self.answer = None if word_id is None else (combo, chosen_word)
+        self.metrics.mark("word_chosen")
+        return chosen_word
+
+    def answer_sent(self, typing_times):
+        """The answer was typed, with the times (from the page) it started being typed and was sent"""
+        self.record_typing(typing_times)
+        if not typing_times or typing_times["enter"] is None:
+            # The turn ended while typing, the answer was never sent so it has no outcome to record
+            self.answer = None
+            self.answer_mask = 0
+            self.guessing = False
+            return
+        self.guesses += 1
+
+    def select_answer(self, combo):
+        """Returns the id of the word to answer the combo with during a turn, or None if there is none"""
+        # Usually an answer was already chosen in the background
+        word_id = self.answers.pop(combo)
+        if word_id is None:
+            word_id = self.choose_word_id(combo)
+        return word_id
+
+    def record_typing(self, typing_times):
+        """Record the times (from the page, in ms) the answer started being typed and was sent"""
+        if typing_times:
+            if typing_times["first_key"]:
+                self.metrics.mark("first_key", typing_times["first_key"] / 1000)
+            if typing_times["enter"]:
+                self.metrics.mark("enter_sent", typing_times["enter"] / 1000)
+
+    def turn_moved_on(self, timestamp: float = None):
+        """The turn moved on while we were waiting on our answer, which means it was accepted unless the game
+        said it rejected it (the bomb went off after a rejection)"""
+        rejected = (
+            self.answer is not None
+            and self.rejection is not None
+            and self.rejection[0] == self.answer[1]
+        )
+        self.answered(not rejected, timestamp)
+
+    def answered(self, accepted: bool, timestamp: float = None):
+        """Record the outcome of the last answer"""
+        self.metrics.end_turn(accepted, timestamp)
+        reason = None
+        if not accepted and self.answer is not None:
+            reason = self.rejection_reason(self.answer[1])
+        if self.outcome_store is not None and self.answer is not None:
+            self.outcome_store.record_answer(
+                self.bot_name, *self.answer, accepted, reason
+            )
+        if (
+            not accepted
+            and self.blacklist is not None
+            and self.answer is not None
+            and self.should_blacklist(self.answer[1], reason)
+        ):
+            self.blacklist.add(self.answer[1])
+        if accepted:
+            # The cached answers were chosen for the letters we needed before
+            if self.strategy == "coverage" and self.answer_mask & self.letters.needed:
+                self.answers.clear()
+            self.letters.use(self.answer_mask)
+        self.answer_mask = 0
+        self.answer = None
+        self.rejection = None
+        self.publish_stats()
+
+    def should_blacklist(self, word: str, reason: str) -> bool:
+        """Whether a rejected word should never be tried again. The blacklist can't forget a word, so a word is
+        only blacklisted once the game said it isn't a word, or after it was rejected in BLACKLIST_GAMES games
+        without a reason (which might have been a slow answer)"""
+        if reason is not None:
+            return reason == page_scripts.NOT_A_WORD
+        games = self.rejected_games.setdefault(word, set())
+        games.add(self.games_played)
+        return len(games) >= self.BLACKLIST_GAMES
+
+    def rejection_reason(self, word: str):
+        """Returns why the game rejected the word, or None if we don't know"""
+        if self.rejection is not None and self.rejection[0] == word:
+            return self.rejection[1]
+        if word in self.played_words:
+            return page_scripts.ALREADY_USED
+        return None
+
+    def record_syllable(self, syllable: str):
+        """Record a syllable the game showed, on any player's turn"""
+        self.syllable = syllable
+        if self.outcome_store is not None:
+            self.outcome_store.record_syllable(syllable)
+        self.publish_stats()
+
+    def record_played_word(self, syllable: str, word: str):
+        """Record a word another player got accepted"""
+        self.played_words.add(word)
+        if self.outcome_store is not None:
+            self.outcome_store.record_played_word(syllable, word)
 
     def word_from_combo(self, combo):
         """Gets a combo and returns a semi random word from it"""
-        len_indices, valid_words = self.words_dict[combo]
-        # In case there is a preference to a certain word length
-        if self.word_length != 0:
-            valid_words = (
-                valid_words[len_indices[self.word_length - 3]:]
-                if self.is_long
-                else valid_words[: len_indices[self.word_length - 3]]
-            )
+        word_id = self.choose_word_id(combo)
 
         # No word available for this combo
-        if not valid_words:
+        if word_id is None:
             return "No idea :("
 
-        chosen_word = random.choice(valid_words)
+        return self.word_index.word(word_id)
+
+    def choose_word_id(self, combo):
+        """Gets a combo and returns the id of a semi random unused word from it, which the game didn't reject
+        before, or None if there isn't one"""
+        while True:
+            word_id = self.pick_word_id(combo)
+            if (
+                word_id is None
+                or self.blacklist is None
+                or self.word_index.word(word_id) not in self.blacklist
+            ):
+                return word_id
+            # Skip the rejected word for the rest of the game
+            self.used_words.add(word_id)
+
+    def pick_word_id(self, combo):
+        """Gets a combo and returns the id of an unused word from it using the bot's strategy, or None"""
+        if self.index_socket:
+            needed = self.letters.needed if self.strategy == "coverage" else 0
+            return self.word_index.choose(
+                combo, self.word_length, self.used_words, needed
+            )
+
+        # Only the words in the wanted length range
+        min_len, max_len = self.word_length
+        postings, start, end = self.word_index.window(combo, min_len, max_len or None)
 
-        return chosen_word
+        # No word available for this combo
+        if start == end:
+            return None
+
+        if self.strategy == "coverage":
+            return self.coverage.choose(
+                postings, start, end, self.used_words, self.letters.needed
+            )
+
+        return random_unused(postings, start, end, self.used_words, self.RANDOM_PICKS)
 
     def enter_room(self):
         """Enters a room with a given link and inputs the nickname"""
@@ -173,8 +595,9 @@ class JKLMBot:
         self.browser.get(self.game_link)
 
         # Get the element when it's clickable
-        name_element = WebDriverWait(self.browser, 20).until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@placeholder]"))
+        name_element = self.wait_until(
+            EC.element_to_be_clickable((By.XPATH, page_scripts.NAME_PATH)),
+            20,
         )
 
         # Delete the original text
@@ -186,7 +609,11 @@ class JKLMBot:
 
     def stop(self):
         """Kill the bot"""
-        self.browser.close()
+        self.stopped = True
+        self.answers.stop()
+        # A pooled browser is returned by the bot's thread once it notices it was stopped
+        if self.browser_pool is None:
+            self.browser.close()
 
     def join_game(self, first: bool = False):
         """Joins a game in the room the bot is in"""
@@ -194,50 +621,62 @@ class JKLMBot:
         if first:
             if "bot" in self.bot_name:
                 # Open chat
-                open_chat_path = "/html/body/div[1]/button"
-                open_chat_element = WebDriverWait(self.browser, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, open_chat_path))
+                open_chat_element = self.wait_until(
+                    EC.element_to_be_clickable((By.XPATH, page_scripts.OPEN_CHAT_PATH)),
+                    5,
                 )
                 open_chat_element.click()
 
                 # Send a msg shouting out this bot
-                chat_path = "/html/body/div[2]/div[4]/div[2]/div[2]/div[2]/textarea"
-                chat = WebDriverWait(self.browser, 3).until(
-                    EC.element_to_be_clickable((By.XPATH, chat_path))
+                chat = self.wait_until(
+                    EC.element_to_be_clickable((By.XPATH, page_scripts.CHAT_PATH)),
+                    3,
                 )
 
-                bot_link = "https://tinyurl.com/bomb-party-bot"
-                enter_text = (
-                    f"Hello! I am a bot made by hadar759\nYou can download me over at "
-                    f"{bot_link} and run more bots like me :D\nHave fun and enjoy this bot!"
-                )
-                chat.send_keys(enter_text)
+                chat.send_keys(self.SHOUTOUT)
                 chat.send_keys(Keys.ENTER)
 
             # Switch to the join button's frame if it's our first time joining
-            wanted_path = "/html/body/div[2]/div[4]/div[1]/iframe"
-            frame = WebDriverWait(self.browser, self.HOUR).until(
-                EC.presence_of_element_located((By.XPATH, wanted_path))
+            frame = self.wait_until(
+                EC.presence_of_element_located((By.XPATH, page_scripts.FRAME_PATH)),
+                self.HOUR,
             )
             # Wait until frame appears
             self.browser.switch_to.frame(frame)
 
         # Join the game
-        wanted_path = "/html/body/div[2]/div[3]/div[1]/div[1]/button"
-        join_button = WebDriverWait(self.browser, self.HOUR).until(
-            EC.element_to_be_clickable((By.XPATH, wanted_path))
-        )
+        join_button = self.locate(page_scripts.JOIN_PATH, self.HOUR, clickable=True)
 
         join_button.click()
 
     def enter_answer(self, answer: str, enter_field):
-        """Enters the given answer into the answer bar"""
+        """Enters the given answer into the answer bar.
+        The whole answer is typed by the page itself, so it only takes a single call to the browser"""
+        keystrokes = [
+            [keys, round(delay * 1000)] for keys, delay in self.keystroke_schedule(answer)
+        ]
+        try:
+            return self.browser.execute_async_script(
+                page_scripts.PLAY_KEYSTROKES, enter_field, keystrokes
+            )
+        # The game replaced the answer box, type in the new one
+        except selenium.common.exceptions.StaleElementReferenceException:
+            self.elements.pop(page_scripts.ANSWER_PATH, None)
+            return self.browser.execute_async_script(
+                page_scripts.PLAY_KEYSTROKES, self.answer_box(), keystrokes
+            )
+
+    def keystroke_schedule(self, answer: str):
+        """Returns the keys to type for the given answer (letters, typos and backspaces),
+        each with the time in seconds to wait after typing them"""
+        schedule = []
+
         # To give the illusion of typing
         if self.humanlike:
             for i in range(len(answer)):
                 letter = answer[i]
                 # Enter a single letter
-                self.enter_keys(enter_field, letter)
+                schedule.append([letter, 0])
 
                 # Generate a random time between letters
                 wait_time = max(
@@ -251,41 +690,33 @@ class JKLMBot:
                 if mistake:
                     mistake_offset = self.get_mistake_offset(answer, i)
                     # Make the error
-                    self.enter_keys(enter_field, answer[mistake_offset])
+                    schedule.append([answer[mistake_offset], wait_time])
                     mistakes += 1
-                    time.sleep(wait_time)
 
                     mistake = random.random() < min(self.mistake_chance - 0.1, 0.01)
                     # Random chance of entering more characters
                     if mistake:
                         mistake_offset = self.get_mistake_offset(answer, mistake_offset)
-                        self.enter_keys(enter_field, answer[mistake_offset])
+                        schedule.append([answer[mistake_offset], wait_time])
                         mistakes += 1
-                        time.sleep(wait_time)
 
                     # Wait a bit
-                    time.sleep(wait_time * 2)
+                    schedule[-1][1] += wait_time * 2
 
                     # Delete the mistakes
-                    [
-                        self.enter_keys(enter_field, Keys.BACKSPACE)
-                        for _ in range(mistakes)
-                    ]
+                    schedule.extend([Keys.BACKSPACE, 0] for _ in range(mistakes))
 
                 # Type letters in a speed of between 0.5 to 0.35 secs per letter
-                time.sleep(wait_time)
+                schedule[-1][1] += wait_time
 
         # If it's an obvious bot just instantly enter the answer
         else:
-            self.enter_keys(enter_field, answer)
+            schedule.append([answer, 0])
 
         # Press enter to send the answer
-        self.enter_keys(enter_field, Keys.ENTER)
+        schedule.append([Keys.ENTER, 0])
 
-    def enter_keys(self, enter_field, keys):
-        """Enter keys to an element if it's possible"""
-        if enter_field.is_displayed():
-            enter_field.send_keys(keys)
+        return schedule
 
     @staticmethod
     def get_mistake_offset(word, index):
@@ -298,12 +729,50 @@ class JKLMBot:
             return random.randint(0, len(word) - 1)
 
 
-def load_words():
-    """Load the indexed words into a dictionary"""
-    with open(resource_path(r"project\combo_dict_final.json"), "r") as words_dict_file:
-        words_dict = json.load(words_dict_file)
-
-    return words_dict
+def launch_browser(headless: bool, lean: bool = False):
+    """Launch a new chrome browser controlled by chromedriver.
+    A lean browser doesn't load images, fonts, sounds or anything outside the game, and runs fewer processes"""
+    options = Options()
+    for argument in chrome_arguments(headless, lean):
+        options.add_argument(argument)
+    if lean:
+        options.add_experimental_option("prefs", LEAN_CHROME_PREFS)
+    browser = webdriver.Chrome(
+        executable_path=chromedriver_path(),
+        chrome_options=options,
+    )
+    if lean:
+        browser.execute_cdp_cmd("Network.enable", {})
+        browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(BLOCKED_URLS)})
+    return browser
+
+
+def chrome_arguments(headless: bool, lean: bool = False):
+    """Returns the command line arguments chrome is started with"""
+    arguments = []
+    if headless:
+        arguments.append("--headless")
+    if lean:
+        arguments.extend(LEAN_CHROME_ARGUMENTS)
+    return arguments
+
+
+def chromedriver_path():
+    """Get the path to the chromedriver executable"""
+    return resource_path(r"project\chromedriver.exe")
+
+
+def load_words(language: str = "en"):
+    """Get the binary word index of the language (made by indexing.build_language_index).
+    Each language's index is only opened once per process, the first time a bot needs it.
+    Installs from before the binary index only have the english combo dictionary, which is converted to the
+    index the first time it's needed"""
+    path = resource_path(os.path.join("project", index_file(language)))
+    with _convert_lock:
+        json_path = resource_path(os.path.join("project", "combo_dict_final.json"))
+        if language == "en" and not os.path.exists(path) and os.path.exists(json_path):
+            json_to_index(json_path, path)
+    return shared_index(path)
 
 
 def resource_path(relative_path):
@@ -0,0 +1,238 @@
+import bisect
+import json
+import math
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The points in a turn the bot records the time (time.time()) of
+STAGES = (
+    "turn_detected",
+    "combo_read",
+    "word_chosen",
+    "first_key",
+    "enter_sent",
+    "answered",
+)
+STAGE_INDICES = {stage: i for i, stage in enumerate(STAGES)}
+# The intervals between stages the bot keeps histograms of
+INTERVALS = {
+    "detect_to_read": ("turn_detected", "combo_read"),
+    "read_to_chosen": ("combo_read", "word_chosen"),
+    "chosen_to_first_key": ("word_chosen", "first_key"),
+    "first_key_to_enter": ("first_key", "enter_sent"),
+    "enter_to_answer": ("enter_sent", "answered"),
+    "turn": ("turn_detected", "answered"),
+}
+# Upper bounds (in seconds) of the histogram buckets, from 0.1ms doubling up to about 100 seconds
+BUCKETS = tuple(0.0001 * 2**i for i in range(21))
+
+
+class TurnMetrics:
+    """The timings of a single bot's turns.
+    The last turns are kept in a preallocated ring buffer and every turn is added to fixed bucket histograms,
+    so recording a turn doesn't allocate anything"""
+
+    def __init__(self, bot_name: str, capacity: int = 1024, sinks=()):
+        self.bot_name = bot_name
+        self.capacity = capacity
+        # The stage timestamps of the last turns, a row of len(STAGES) for each turn
+        self.timestamps = array("d", [0.0]) * (capacity * len(STAGES))
+        self.outcomes = bytearray(capacity)
+        # Bucket counts (with one more bucket for anything longer), and sums of every interval
+        self.histograms = {
+            interval: array("L", [0]) * (len(BUCKETS) + 1) for interval in INTERVALS
+        }
+        self.sums = dict.fromkeys(INTERVALS, 0.0)
+        self.turns = 0
+        self.accepted = 0
+        self.rejected = 0
+        # Resident memory of the bot's browser process tree in bytes, 0 if it wasn't measured
+        self.memory = 0
+        self.sinks = list(sinks)
+        for sink in self.sinks:
+            sink.attach(self)
+
+    def start_turn(self, detected_at: float = None):
+        """Start recording a new turn (or a new guess in the same turn)"""
+        self.turns += 1
+        row = self._row()
+        for i in range(len(STAGES)):
+            self.timestamps[row + i] = 0.0
+        self.mark("turn_detected", detected_at)
+
+    def mark(self, stage: str, timestamp: float = None):
+        """Record the time the current turn reached a stage"""
+        if self.turns:
+            self.timestamps[self._row() + STAGE_INDICES[stage]] = (
+                time.time() if timestamp is None else timestamp
+            )
+
+    def end_turn(self, accepted: bool, timestamp: float = None):
+        """Record whether the current turn's answer was accepted, and send the turn to the sinks"""
+        if not self.turns:
+            return
+        self.mark("answered", timestamp)
+        self.outcomes[(self.turns - 1) % self.capacity] = accepted
+        if accepted:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+
+        row = self._row()
+        for interval, (start, end) in INTERVALS.items():
+            start = self.timestamps[row + STAGE_INDICES[start]]
+            end = self.timestamps[row + STAGE_INDICES[end]]
+            # Skip stages the turn didn't reach
+            if start and end:
+                duration = max(0.0, end - start)
+                self.histograms[interval][bisect.bisect_left(BUCKETS, duration)] += 1
+                self.sums[interval] += duration
+
+        for sink in self.sinks:
+            sink.record(self, self.last_turn())
+
+    def last_turn(self) -> dict:
+        """Returns the stage timestamps and outcome of the latest turn"""
+        row = self._row()
+        turn = {"bot": self.bot_name, "turn": self.turns}
+        for i, stage in enumerate(STAGES):
+            turn[stage] = self.timestamps[row + i] or None
+        turn["accepted"] = bool(self.outcomes[(self.turns - 1) % self.capacity])
+        turn["memory"] = self.memory
+        return turn
+
+    def last_duration(self, interval: str = "turn"):
+        """Returns the seconds one of INTERVALS took in the latest turn, or None if it didn't get that far"""
+        if not self.turns:
+            return None
+        start, end = INTERVALS[interval]
+        row = self._row()
+        start = self.timestamps[row + STAGE_INDICES[start]]
+        end = self.timestamps[row + STAGE_INDICES[end]]
+        return max(0.0, end - start) if start and end else None
+
+    def reject_rate(self) -> float:
+        answered = self.accepted + self.rejected
+        return self.rejected / answered if answered else 0.0
+
+    def _row(self) -> int:
+        return (self.turns - 1) % self.capacity * len(STAGES)
+
+
+class MetricsSink:
+    """Somewhere turn metrics are sent to. attach is called once for every bot using the sink,
+    and record after each of its turns"""
+
+    def attach(self, metrics: TurnMetrics):
+        pass
+
+    def record(self, metrics: TurnMetrics, turn: dict):
+        pass
+
+    def close(self):
+        pass
+
+
+class CallbackSink(MetricsSink):
+    """Calls a function with every finished turn"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def record(self, metrics: TurnMetrics, turn: dict):
+        self.callback(turn)
+
+
+class JsonlSink(MetricsSink):
+    """Appends every finished turn as a line of json to a file"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "a", buffering=1)
+        self.lock = threading.Lock()
+
+    def record(self, metrics: TurnMetrics, turn: dict):
+        line = json.dumps(turn)
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class PrometheusSink(MetricsSink):
+    """Serves the histograms of every attached bot in the Prometheus text format on localhost"""
+
+    def __init__(self, port: int = 9464):
+        self.metrics = []
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def attach(self, metrics: TurnMetrics):
+        self.metrics.append(metrics)
+
+    def render(self) -> str:
+        """Returns the current metrics of every bot in the Prometheus text format.
+        Every family's samples come right after its TYPE line, for all of the bots"""
+        bots = [
+            (json.dumps(metrics.bot_name), metrics) for metrics in list(self.metrics)
+        ]
+
+        lines = ["# TYPE bomb_party_answers_total counter"]
+        for bot, metrics in bots:
+            for outcome in ("accepted", "rejected"):
+                lines.append(
+                    f'bomb_party_answers_total{{bot={bot},outcome="{outcome}"}} '
+                    f"{getattr(metrics, outcome)}"
+                )
+
+        lines.append("# TYPE bomb_party_seconds histogram")
+        for bot, metrics in bots:
+            for interval, counts in metrics.histograms.items():
+                labels = f"bot={bot},interval={json.dumps(interval)}"
+                total = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), counts):
+                    total += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(
+                        f'bomb_party_seconds_bucket{{{labels},le="{le}"}} {total}'
+                    )
+                lines.append(
+                    f"bomb_party_seconds_sum{{{labels}}} {metrics.sums[interval]}"
+                )
+                lines.append(f"bomb_party_seconds_count{{{labels}}} {total}")
+
+        lines.append("# TYPE bomb_party_browser_memory_bytes gauge")
+        for bot, metrics in bots:
+            lines.append(
+                f"bomb_party_browser_memory_bytes{{bot={bot}}} {metrics.memory}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(values, percent: float) -> float:
+    """Returns the value at the given percentile (nearest rank)"""
+    if not values:
+        return math.nan
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
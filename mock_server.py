@@ -0,0 +1,337 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Syllables the scripted games ask for, when no others are given
+DEFAULT_SYLLABLES = (
+    "er", "in", "st", "on", "an", "re", "ing", "ent", "ter", "ion",
+    "al", "ar", "ou", "es", "ti", "ate", "ch", "le", "ro", "ne",
+)
+
+# The room page. Its layout matches the paths in page_scripts (the name input, chat and game frame)
+ROOM_PAGE = """<!DOCTYPE html>
+<html>
+<body>
+<div><button id="open-chat">Chat</button></div>
+<div>
+    <div></div>
+    <div></div>
+    <div><form id="name-form"><input placeholder="Your name" value="Guest"></form></div>
+    <div>
+        <div id="game-holder"></div>
+        <div>
+            <div></div>
+            <div id="chat" style="display: none"><div></div><div><textarea></textarea></div></div>
+        </div>
+    </div>
+</div>
+<script>
+const ROOM = __ROOM__;
+document.getElementById("open-chat").onclick = () => {
+    document.getElementById("chat").style.display = "";
+};
+document.querySelector("#chat textarea").onkeydown = event => {
+    if (event.key === "Enter") {
+        event.preventDefault();
+        event.target.value = "";
+    }
+};
+document.getElementById("name-form").onsubmit = event => {
+    event.preventDefault();
+    const name = event.target.querySelector("input").value;
+    event.target.style.display = "none";
+    const frame = document.createElement("iframe");
+    frame.src = `/game/${ROOM}?name=${encodeURIComponent(name)}`;
+    frame.style.width = "800px";
+    frame.style.height = "600px";
+    document.getElementById("game-holder").appendChild(frame);
+};
+</script>
+</body>
+</html>
+"""
+
+# The game frame. Its layout matches the paths in page_scripts (join button, round, prompt and answer input)
+GAME_PAGE = """<!DOCTYPE html>
+<html>
+<body>
+<div></div>
+<div>
+    <div><div class="round" style="display: none">Round</div></div>
+    <div>
+        <div></div>
+        <div><div></div><div><div id="prompt"></div></div></div>
+    </div>
+    <div>
+        <div><div id="join"><button>Join game</button></div></div>
+        <div>
+            <div></div>
+            <div id="self-turn" style="display: none"><form><input type="text"></form></div>
+        </div>
+    </div>
+</div>
+<script>
+const ROOM = __ROOM__;
+const NAME = __NAME__;
+const round = document.querySelector(".round");
+const prompt = document.getElementById("prompt");
+const join = document.getElementById("join");
+const selfTurn = document.getElementById("self-turn");
+const input = selfTurn.querySelector("input");
+let myTurn = false;
+
+const post = (path, body) => fetch(path, {method: "POST", body: JSON.stringify(body)});
+
+join.querySelector("button").onclick = () => post("/api/join", {room: ROOM, name: NAME});
+selfTurn.querySelector("form").onsubmit = event => {
+    event.preventDefault();
+    post("/api/submit", {room: ROOM, name: NAME, word: input.value});
+};
+
+const render = state => {
+    const playing = state.phase === "playing";
+    round.style.display = playing ? "" : "none";
+    join.style.display = !playing && !state.players.includes(NAME) ? "" : "none";
+    prompt.textContent = state.syllable.toUpperCase();
+    const mine = playing && state.current === NAME;
+    if (mine && !myTurn) {
+        input.value = "";
+    }
+    myTurn = mine;
+    selfTurn.style.display = mine ? "" : "none";
+};
+
+// Long poll the server for changes in the game
+(async () => {
+    let version = -1;
+    while (true) {
+        try {
+            const response = await fetch(`/api/state?room=${ROOM}&version=${version}`);
+            const state = await response.json();
+            version = state.version;
+            render(state);
+        } catch (error) {
+            await new Promise(resolve => setTimeout(resolve, 500));
+        }
+    }
+})();
+</script>
+</body>
+</html>
+"""
+
+
+class MockRoom:
+    """A scripted bomb party game. Starts once enough players joined, gives each player a turn in order and ends
+    after a set number of turns, after which the players have to join again"""
+
+    def __init__(
+        self,
+        code: str,
+        syllables=DEFAULT_SYLLABLES,
+        turns_per_game: int = 20,
+        min_players: int = 1,
+        turn_time: float = 5,
+        words=None,
+    ):
+        self.code = code
+        self.syllables = syllables
+        self.turns_per_game = turns_per_game
+        self.min_players = min_players
+        self.turn_time = turn_time
+        # The words the game accepts, any word containing the syllable if None
+        self.words = words
+        self.condition = threading.Condition()
+        self.version = 0
+        self.phase = "lobby"
+        self.players = []
+        self.current = None
+        self.syllable = ""
+        self.used_words = set()
+        self.turns = 0
+        self.games_played = 0
+        # Every turn as a dict of the player, syllable, start time and end time (time.time()) and whether it was
+        # answered or the bomb went off
+        self.turn_log = []
+
+    def state(self) -> dict:
+        return {
+            "version": self.version,
+            "phase": self.phase,
+            "players": self.players,
+            "current": self.current,
+            "syllable": self.syllable,
+        }
+
+    def wait_for_change(self, version: int, timeout: float = 25) -> dict:
+        """Blocks until the game changes from the given version and returns its state"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.state()
+
+    def join(self, name: str):
+        with self.condition:
+            if self.phase == "lobby" and name not in self.players:
+                self.players.append(name)
+                if len(self.players) >= self.min_players:
+                    self.phase = "playing"
+                    self.turns = 0
+                    self.used_words.clear()
+                    self._next_turn()
+                self._changed()
+
+    def submit(self, name: str, word: str) -> bool:
+        """Returns whether the answer was accepted"""
+        word = word.strip().lower()
+        with self.condition:
+            if self.phase != "playing" or name != self.current:
+                return False
+            if (
+                self.syllable not in word
+                or word in self.used_words
+                or self.words is not None
+                and word not in self.words
+            ):
+                return False
+            self.used_words.add(word)
+            self._end_turn(answered=True)
+            return True
+
+    def _next_turn(self):
+        if self.turns >= self.turns_per_game:
+            self.phase = "lobby"
+            self.players = []
+            self.current = None
+            self.syllable = ""
+            self.games_played += 1
+            return
+
+        self.current = self.players[self.turns % len(self.players)]
+        self.syllable = random.choice(self.syllables)
+        self.turns += 1
+        self.turn_log.append(
+            {
+                "player": self.current,
+                "syllable": self.syllable,
+                "started": time.time(),
+                "ended": None,
+                "answered": False,
+            }
+        )
+        timer = threading.Timer(self.turn_time, self._bomb, [len(self.turn_log)])
+        timer.daemon = True
+        timer.start()
+
+    def _bomb(self, turn_number: int):
+        """The turn's time ran out"""
+        with self.condition:
+            if self.phase == "playing" and len(self.turn_log) == turn_number:
+                self._end_turn(answered=False)
+
+    def _end_turn(self, answered: bool):
+        self.turn_log[-1]["ended"] = time.time()
+        self.turn_log[-1]["answered"] = answered
+        self._next_turn()
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self.condition.notify_all()
+
+
+class MockServer(ThreadingHTTPServer):
+    """A local stand in for jklm.fun, serving scripted bomb party rooms"""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, **room_settings):
+        super().__init__(("127.0.0.1", port), MockRequestHandler)
+        self.room_settings = room_settings
+        self.rooms = {}
+        self.rooms_lock = threading.Lock()
+
+    def room(self, code: str) -> MockRoom:
+        """Returns the room with the given code, creating it if it doesn't exist"""
+        with self.rooms_lock:
+            if code not in self.rooms:
+                self.rooms[code] = MockRoom(code, **self.room_settings)
+            return self.rooms[code]
+
+    def room_link(self, code: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/{code}"
+
+    def start(self):
+        """Serve in a background thread"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/api/state":
+            room = self.server.room(query["room"])
+            self.send_json(room.wait_for_change(int(query.get("version", -1))))
+        elif url.path.startswith("/game/"):
+            page = GAME_PAGE.replace("__ROOM__", json.dumps(url.path[len("/game/"):]))
+            self.send_html(page.replace("__NAME__", json.dumps(query.get("name", ""))))
+        elif url.path.count("/") == 1 and len(url.path) > 1:
+            self.send_html(ROOM_PAGE.replace("__ROOM__", json.dumps(url.path[1:])))
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        room = self.server.room(body["room"])
+
+        if self.path == "/api/join":
+            room.join(body["name"])
+            self.send_json({})
+        elif self.path == "/api/submit":
+            self.send_json({"accepted": room.submit(body["name"], body["word"])})
+        else:
+            self.send_error(404)
+
+    def send_html(self, page: str):
+        self.send_body(page.encode("utf-8"), "text/html; charset=utf-8")
+
+    def send_json(self, value):
+        self.send_body(json.dumps(value).encode("utf-8"), "application/json")
+
+    def send_body(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Don't print every request
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve scripted bomb party rooms locally")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--turns", type=int, default=20, help="turns per game")
+    parser.add_argument("--players", type=int, default=1, help="players needed to start a game")
+    parser.add_argument("--turn-time", type=float, default=5, help="seconds until the bomb goes off")
+    args = parser.parse_args()
+
+    server = MockServer(
+        args.port,
+        turns_per_game=args.turns,
+        min_players=args.players,
+        turn_time=args.turn_time,
+    )
+    print(f"Serving rooms at {server.room_link('<code>')}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
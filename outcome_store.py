@@ -0,0 +1,158 @@
+import contextlib
+import queue
+import sqlite3
+import threading
+import time
+
+from .page_scripts import NOT_A_WORD
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    time REAL NOT NULL,
+    bot TEXT NOT NULL,
+    syllable TEXT NOT NULL,
+    word TEXT NOT NULL,
+    accepted INTEGER NOT NULL,
+    reason TEXT
+);
+CREATE INDEX IF NOT EXISTS answers_word ON answers (word);
+CREATE TABLE IF NOT EXISTS played_words (
+    time REAL NOT NULL,
+    syllable TEXT NOT NULL,
+    word TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS played_words_word ON played_words (word);
+CREATE TABLE IF NOT EXISTS syllables (
+    time REAL NOT NULL,
+    syllable TEXT NOT NULL
+);
+"""
+# The insert of every kind of event the store records
+INSERTS = {
+    "answers": "INSERT INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+    "played_words": "INSERT INTO played_words VALUES (?, ?, ?)",
+    "syllables": "INSERT INTO syllables VALUES (?, ?)",
+}
+
+
+class OutcomeStore:
+    """What happened in the bots' games, kept in a local SQLite database between runs:
+    the answers the bots gave and whether the game accepted them, words other players used and the syllables
+    the game showed. Events are queued and written by a background thread in batches, so recording one never
+    waits for the disk"""
+
+    def __init__(
+        self, path: str = "outcomes.db", batch_size: int = 256, flush_time: float = 1
+    ):
+        self.path = path
+        # Most events to write in one transaction, and most seconds an event waits before it's written
+        self.batch_size = batch_size
+        self.flush_time = flush_time
+        self._events = queue.Queue()
+        self._closed = False
+
+        with self._connect() as connection:
+            # Readers don't block the writer (and the other way around) in WAL mode
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            # Databases from before rejection reasons were recorded
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(answers)")]
+            if "reason" not in columns:
+                connection.execute("ALTER TABLE answers ADD COLUMN reason TEXT")
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def record_answer(
+        self, bot: str, syllable: str, word: str, accepted: bool, reason: str = None
+    ):
+        """Record an answer, and why the game rejected it if it said so"""
+        row = (time.time(), bot, syllable, word, int(accepted), reason)
+        self._events.put(("answers", row))
+
+    def record_played_word(self, syllable: str, word: str):
+        """Record a word another player used"""
+        self._events.put(("played_words", (time.time(), syllable, word)))
+
+    def record_syllable(self, syllable: str):
+        """Record a syllable the game showed, on anyone's turn"""
+        self._events.put(("syllables", (time.time(), syllable)))
+
+    def rejected_words(self, min_rejections: int = 3):
+        """Returns the words the game never accepted, and either said aren't words or rejected without a reason
+        at least min_rejections times. A rejection without a reason might have only been a slow answer, and a
+        word another player used is a word, so those are never counted"""
+        with self._connect() as connection:
+            return {
+                word
+                for word, in connection.execute(
+                    "SELECT word FROM answers "
+                    "WHERE word NOT IN (SELECT word FROM played_words) "
+                    "GROUP BY word HAVING SUM(accepted) = 0 AND ("
+                    "SUM(reason = ?) > 0 OR SUM(reason IS NULL) >= ?)",
+                    (NOT_A_WORD, min_rejections),
+                )
+            }
+
+    def played_words(self):
+        """Returns every word other players used, and how many times"""
+        with self._connect() as connection:
+            return dict(
+                connection.execute(
+                    "SELECT word, COUNT(*) FROM played_words GROUP BY word"
+                )
+            )
+
+    def syllable_counts(self):
+        """Returns how many times the game showed every syllable"""
+        with self._connect() as connection:
+            return dict(
+                connection.execute(
+                    "SELECT syllable, COUNT(*) FROM syllables GROUP BY syllable"
+                )
+            )
+
+    def close(self):
+        """Write the queued events and stop the writer"""
+        if not self._closed:
+            self._closed = True
+            self._events.put(None)
+            self._writer.join()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """A connection to the database, which commits and closes when done"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _write(self):
+        with self._connect() as connection:
+            closing = False
+            while not closing:
+                batch = [self._events.get()]
+                # Give more events a chance to come in, so they're committed together
+                deadline = time.monotonic() + self.flush_time
+                while batch[-1] is not None and len(batch) < self.batch_size:
+                    try:
+                        batch.append(
+                            self._events.get(
+                                timeout=max(0.0, deadline - time.monotonic())
+                            )
+                        )
+                    except queue.Empty:
+                        break
+
+                # The store was closed
+                if batch[-1] is None:
+                    closing = True
+                    batch.pop()
+
+                tables = {}
+                for table, row in batch:
+                    tables.setdefault(table, []).append(row)
+                for table, rows in tables.items():
+                    connection.executemany(INSERTS[table], rows)
+                connection.commit()
@@ -0,0 +1,163 @@
+# Paths of the elements the bot uses on the game page, and javascript the bot runs inside the game's frame
+
+# The paths of the room elements, outside the game frame
+NAME_PATH = "//input[@placeholder]"
+OPEN_CHAT_PATH = "/html/body/div[1]/button"
+CHAT_PATH = "/html/body/div[2]/div[4]/div[2]/div[2]/div[2]/textarea"
+FRAME_PATH = "/html/body/div[2]/div[4]/div[1]/iframe"
+
+# The paths of the game elements inside the game frame
+JOIN_PATH = "/html/body/div[2]/div[3]/div[1]/div[1]/button"
+ROUND_CLASS = "round"
+PROMPT_PATH = "/html/body/div[2]/div[2]/div[2]/div[2]/div"
+ANSWER_PATH = "/html/body/div[2]/div[3]/div[2]/div[2]/form/input"
+
+# Reasons the game gives for rejecting a word
+NOT_A_WORD = "notInDictionary"
+ALREADY_USED = "alreadyUsed"
+
+# Installs a MutationObserver which queues an event whenever a round starts or ends, or our turn starts or ends,
+# and whenever another player gets a new syllable.
+# When the game frame exposes the game's socket it also queues why our answers were rejected, and the words other
+# players got accepted.
+# Running it more than once is harmless.
+INSTALL_WATCHER = f"""
+if (!window.__bombPartyWatcher) {{
+    const byPath = path => document.evaluate(
+        path, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    const isShown = element => !!element && element.getClientRects().length > 0
+        && getComputedStyle(element).visibility !== "hidden";
+
+    const watcher = {{events: [], waiting: null, state: {{round: false, turn: false, syllable: ""}}}};
+    watcher.snapshot = () => {{
+        const prompt = byPath("{PROMPT_PATH}");
+        return {{
+            round: isShown(document.getElementsByClassName("{ROUND_CLASS}")[0]),
+            turn: isShown(byPath("{ANSWER_PATH}")),
+            syllable: prompt ? prompt.textContent.trim().toLowerCase() : "",
+        }};
+    }};
+    watcher.push = event => {{
+        event.time = Date.now();
+        if (watcher.waiting) {{
+            const resolve = watcher.waiting;
+            watcher.waiting = null;
+            resolve(event);
+        }} else {{
+            watcher.events.push(event);
+        }}
+    }};
+    watcher.check = () => {{
+        const last = watcher.state;
+        const state = watcher.state = watcher.snapshot();
+        if (state.round && !last.round) {{
+            watcher.push({{type: "round_start"}});
+        }}
+        if (state.round && state.turn && (!last.turn || state.syllable !== last.syllable)) {{
+            watcher.push({{type: "turn", syllable: state.syllable}});
+        }} else if (last.turn && !state.turn) {{
+            watcher.push({{type: "turn_end", syllable: last.syllable}});
+        }}
+        if (state.round && !state.turn && state.syllable && state.syllable !== last.syllable) {{
+            watcher.push({{type: "syllable", syllable: state.syllable}});
+        }}
+        if (last.round && !state.round) {{
+            watcher.push({{type: "round_end"}});
+        }}
+    }};
+
+    new MutationObserver(watcher.check).observe(
+        document.body, {{subtree: true, childList: true, attributes: true, characterData: true}}
+    );
+    if (window.socket && typeof window.socket.on === "function") {{
+        // What every player last typed, by peer id
+        const typed = {{}};
+        window.socket.on("setPlayerWord", (peerId, word) => {{
+            typed[peerId] = word;
+        }});
+        window.socket.on("failWord", (peerId, reason) => {{
+            if (peerId === window.selfPeerId) {{
+                watcher.push({{type: "rejected", word: (typed[peerId] || "").trim().toLowerCase(), reason}});
+            }}
+        }});
+        window.socket.on("correctWord", ({{playerPeerId}}) => {{
+            if (playerPeerId !== window.selfPeerId && typed[playerPeerId]) {{
+                watcher.push({{
+                    type: "played_word",
+                    word: typed[playerPeerId].trim().toLowerCase(),
+                    syllable: watcher.state.syllable,
+                }});
+            }}
+        }});
+    }}
+    window.__bombPartyWatcher = watcher;
+    watcher.check();
+}}
+"""
+
+# Waits for the next watcher event and returns it, or returns null if no event came in arguments[0] milliseconds.
+# A null timeout waits until the script timeout.
+WAIT_FOR_EVENT = """
+const done = arguments[arguments.length - 1];
+const timeout = arguments[0];
+const watcher = window.__bombPartyWatcher;
+if (watcher.events.length) {
+    done(watcher.events.shift());
+    return;
+}
+let timer = null;
+watcher.waiting = event => {
+    clearTimeout(timer);
+    done(event);
+};
+if (timeout !== null) {
+    timer = setTimeout(() => {
+        watcher.waiting = null;
+        done(null);
+    }, timeout);
+}
+"""
+
+# Returns the current state of the game as the watcher sees it
+WATCHER_STATE = "return window.__bombPartyWatcher.snapshot();"
+
+# Types a list of [keys, milliseconds to wait afterwards] (arguments[1]) into the answer input (arguments[0]).
+# Stops early if the input is hidden, meaning our turn is over.
+# Returns the times (Date.now()) the first key and the enter key were typed.
+PLAY_KEYSTROKES = """
+const [input, keystrokes] = arguments;
+const done = arguments[arguments.length - 1];
+const BACKSPACE = "\\ue003";
+const ENTER = "\\ue007";
+const fireInput = () => input.dispatchEvent(new Event("input", {bubbles: true}));
+
+const times = {first_key: null, enter: null};
+let next = 0;
+const typeNext = () => {
+    if (next >= keystrokes.length || input.getClientRects().length === 0) {
+        done(times);
+        return;
+    }
+    const [keys, delay] = keystrokes[next++];
+    if (times.first_key === null) {
+        times.first_key = Date.now();
+    }
+    if (keys === ENTER) {
+        times.enter = Date.now();
+        const keydown = new KeyboardEvent("keydown", {key: "Enter", code: "Enter", keyCode: 13, bubbles: true, cancelable: true});
+        // Submit the form unless the game already handled the enter key
+        if (input.dispatchEvent(keydown) && input.form) {
+            input.form.requestSubmit();
+        }
+    } else if (keys === BACKSPACE) {
+        input.value = input.value.slice(0, -1);
+        fireInput();
+    } else {
+        input.value += keys;
+        fireInput();
+    }
+    setTimeout(typeNext, delay);
+};
+typeNext();
+"""
@@ -0,0 +1,429 @@
+import bisect
+import functools
+import itertools
+import mmap
+import random
+import struct
+import threading
+from array import array
+from string import ascii_lowercase
+
+try:
+    import numpy
+except ImportError:
+    # Compressed postings are decoded in pure python instead, which is slower but only done once per combo
+    numpy = None
+
+# File layout (all integers are little endian uint32 unless stated otherwise):
+#   header        - MAGIC, version (uint16), flags (uint16), then the counts and section offsets below
+#   word offsets  - word_count + 1 byte offsets into the word blob
+#   word blob     - the utf-8 encoded words, each followed by a null byte, sorted by length and then alphabetically
+#   length starts - max_len + 2 word ids, the value at i being the id of the first word of length i
+#   combo offsets - combo_count + 1 byte offsets into the combo blob
+#   combo blob    - the utf-8 encoded combos, sorted
+#   posting offs  - combo_count + 1 offsets into the postings
+#   postings      - word ids of every combo, sorted
+#   length counts - max_len + 2 counts for every combo, the value at i being how many of its words are shorter than i
+#   suffix array  - byte offsets in the word blob of every character, sorted by the rest of the word from there
+#   letter masks  - a mask for every word, bit i set if the word has the i-th letter of the alphabet (a-z)
+#   combo weights - a weight for every combo, how many times the game was seen showing it (see outcome_store.py)
+# If the FLAG_VARINT_POSTINGS flag is set, each combo's postings are stored as the differences between consecutive
+# word ids (the first one from 0) in LEB128 varints instead, and the posting offsets are byte offsets.
+# Since the words are sorted by length, a combo's postings are grouped by length as well,
+# and the length counts give the range of words of any length in O(1).
+# The postings are only kept for the common (short) combos, any other combo is looked up in the suffix array.
+MAGIC = b"BPIX"
+FORMAT_VERSION = 5
+SECTIONS = (
+    "word_offsets",
+    "word_blob",
+    "length_starts",
+    "combo_offsets",
+    "combo_blob",
+    "posting_offsets",
+    "postings",
+    "length_counts",
+    "suffix_array",
+    "letter_masks",
+    "combo_weights",
+)
+FLAG_VARINT_POSTINGS = 1
+HEADER = struct.Struct(f"<4sHH{3 + len(SECTIONS)}I")
+# How many looked up combos which aren't in the postings to keep
+SEARCH_CACHE_SIZE = 256
+# How many combos to keep the decoded postings of, when the postings are compressed
+DECODE_CACHE_SIZE = 2048
+# The letters and combo sizes each language's index is built with, by jklm's language code
+LANGUAGES = {
+    "en": {"alphabet": ascii_lowercase, "ngram_sizes": (2, 3)},
+    "fr": {"alphabet": ascii_lowercase + "àâæçéèêëîïôœùûüÿ", "ngram_sizes": (2, 3)},
+    "de": {"alphabet": ascii_lowercase + "äöüß", "ngram_sizes": (2, 3)},
+    "es": {"alphabet": ascii_lowercase + "áéíñóúü", "ngram_sizes": (2, 3)},
+    "it": {"alphabet": ascii_lowercase + "àèéìíîòóùú", "ngram_sizes": (2, 3)},
+    "pt-br": {"alphabet": ascii_lowercase + "áâãàçéêíóôõú", "ngram_sizes": (2, 3)},
+}
+
+# Indices shared by every bot in the process, by path
+_shared_indices = {}
+_shared_indices_lock = threading.Lock()
+
+
+class WordIndex:
+    """A read only view of a binary combo index.
+    The file is memory mapped, so nothing is read until it's needed and the pages are shared between processes.
+    The index is never modified after it's opened, so it's safe to share between threads"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as index_file:
+            self._mmap = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, version, flags, *fields = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a combo index")
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has index version {version}, expected {FORMAT_VERSION}"
+            )
+        self.word_count, self.combo_count, self.max_len, *offsets = fields
+        offsets.append(len(view))
+
+        sections = {}
+        for i, name in enumerate(SECTIONS):
+            sections[name] = view[offsets[i] : offsets[i + 1]]
+
+        self._word_offsets = sections["word_offsets"].cast("I")
+        self._word_blob = sections["word_blob"]
+        self._length_starts = sections["length_starts"].cast("I")
+        self._combo_offsets = sections["combo_offsets"].cast("I")
+        self._combo_blob = sections["combo_blob"]
+        self._posting_offsets = sections["posting_offsets"].cast("I")
+        # Compressed postings are decoded the first time their combo is used
+        self.compressed = bool(flags & FLAG_VARINT_POSTINGS)
+        if self.compressed:
+            self._postings = sections["postings"]
+        else:
+            self._postings = sections["postings"].cast("I")
+        self._length_counts = sections["length_counts"].cast("I")
+        self._suffix_array = sections["suffix_array"].cast("I")
+        self._letter_masks = sections["letter_masks"].cast("I")
+        self._combo_weights = sections["combo_weights"].cast("I")
+        # The ids of the combos which were already looked up, so they're only searched for once
+        self._combo_ids = {}
+        # The combo ids by weight and then word count, most first, sorted the first time they're needed
+        self._combo_ranking = None
+        self._ranking_lock = threading.Lock()
+        self._search = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search)
+        self._decode = functools.lru_cache(maxsize=DECODE_CACHE_SIZE)(self._decode)
+
+    def __len__(self):
+        return self.word_count
+
+    def __contains__(self, combo: str):
+        return len(self.postings(combo)) > 0
+
+    def word(self, word_id: int) -> str:
+        """Returns the word with the given id"""
+        start, end = self._word_offsets[word_id], self._word_offsets[word_id + 1]
+        # Skip the null byte at the end
+        return str(self._word_blob[start : end - 1], "utf-8")
+
+    def letter_mask(self, word_id: int) -> int:
+        """Returns the mask of the letters in the word with the given id"""
+        return self._letter_masks[word_id]
+
+    def combo_weight(self, combo: str) -> int:
+        """Returns how many times the game was seen showing the combo when the index was built"""
+        combo_id = self._find_combo(combo)
+        return 0 if combo_id is None else self._combo_weights[combo_id]
+
+    @property
+    def letter_masks(self):
+        """The letter masks of all words, by word id"""
+        return self._letter_masks
+
+    @property
+    def length_starts(self):
+        """The id of the first word of every length, by length"""
+        return self._length_starts
+
+    def combos(self):
+        """Yields every combo in the index"""
+        for i in range(self.combo_count):
+            yield str(self._combo(i), "utf-8")
+
+    def common_combos(self, count: int):
+        """Returns the count combos the game was seen showing most, then the ones with the most words.
+        The ranking is only sorted once for every bot sharing the index, and without decoding any postings"""
+        with self._ranking_lock:
+            if self._combo_ranking is None:
+                stride = self.max_len + 2
+                # The last length count of a combo is how many words it has
+                sizes = self._length_counts[stride - 1 :: stride]
+                weights = self._combo_weights
+                self._combo_ranking = sorted(
+                    range(self.combo_count),
+                    key=lambda combo_id: (weights[combo_id], sizes[combo_id]),
+                    reverse=True,
+                )
+        return [str(self._combo(i), "utf-8") for i in self._combo_ranking[:count]]
+
+    def postings(self, combo: str):
+        """Returns the sorted ids of all words the combo appears in. Works for a combo of any length"""
+        return self._lookup(combo)[0]
+
+    def window(self, combo: str, min_len: int = 0, max_len: int = None):
+        """Returns the combo's postings, and the start and end indices of its words between min_len and max_len
+        (inclusive) in them. The postings are grouped by length, so finding the range is O(1)"""
+        postings, length_counts = self._lookup(combo)
+        start = length_counts[self._clamp_length(min_len)]
+        if max_len is None:
+            return postings, start, len(postings)
+        end = length_counts[self._clamp_length(max_len + 1)]
+        return postings, start, max(start, end)
+
+    def words(self, combo: str):
+        """Returns all words the combo appears in, sorted by length"""
+        return [self.word(word_id) for word_id in self.postings(combo)]
+
+    def section(self, name: str):
+        """Returns the raw view of one of the SECTIONS, for patching the index (see indexing.update_index)"""
+        return getattr(self, f"_{name}")
+
+    def find_word(self, word: str):
+        """Binary search the words (sorted by length, then alphabetically) for the given one.
+        Returns its id, or the id it would have as a negative number minus 1 if it isn't in the index"""
+        key = (len(word), word)
+        low, high = 0, self.word_count
+        while low < high:
+            middle = (low + high) // 2
+            middle_word = self.word(middle)
+            if (len(middle_word), middle_word) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.word_count and self.word(low) == word:
+            return low
+        return -low - 1
+
+    def close(self):
+        """Release the memory map. Views returned by the index can't be used afterwards"""
+        self._combo_ids.clear()
+        self._search.cache_clear()
+        self._decode.cache_clear()
+        for name in SECTIONS:
+            getattr(self, f"_{name}").release()
+        self._mmap.close()
+
+    def _clamp_length(self, length: int) -> int:
+        """Returns the index of the given length in the length counts"""
+        return min(max(0, length), self.max_len + 1)
+
+    def _lookup(self, combo: str):
+        """Returns the postings and the length counts of the combo"""
+        combo_id = self._combo_ids.get(combo)
+        if combo_id is None:
+            combo_id = self._find_combo(combo)
+            if combo_id is None:
+                return self._search(combo)
+            self._combo_ids[combo] = combo_id
+        start = self._posting_offsets[combo_id]
+        end = self._posting_offsets[combo_id + 1]
+        stride = self.max_len + 2
+        return (
+            self._decode(combo_id) if self.compressed else self._postings[start:end],
+            self._length_counts[combo_id * stride : (combo_id + 1) * stride],
+        )
+
+    def _decode(self, combo_id: int):
+        """Returns the decoded postings of a combo, when the postings are compressed"""
+        start = self._posting_offsets[combo_id]
+        end = self._posting_offsets[combo_id + 1]
+        return decode_varint_deltas(self._postings[start:end])
+
+    def _combo(self, combo_id: int) -> bytes:
+        start, end = self._combo_offsets[combo_id], self._combo_offsets[combo_id + 1]
+        return bytes(self._combo_blob[start:end])
+
+    def _find_combo(self, combo: str):
+        """Binary search the sorted combos for the given one, returns its id or None"""
+        key = combo.encode("utf-8")
+        low, high = 0, self.combo_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._combo(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.combo_count and self._combo(low) == key:
+            return low
+        return None
+
+    def _search(self, combo: str):
+        """Finds the ids of all words containing the combo using the suffix array.
+        The suffixes starting with the combo are next to each other, so two binary searches find all of them"""
+        key = combo.encode("utf-8")
+        if not key:
+            return self._postings[0:0], memoryview(array("I", [0] * (self.max_len + 2)))
+
+        start = self._suffix_bound(key, upper=False)
+        end = self._suffix_bound(key, upper=True, low=start)
+        # A word might contain the combo more than once
+        word_ids = {
+            bisect.bisect_right(self._word_offsets, position) - 1
+            for position in self._suffix_array[start:end]
+        }
+        postings = array("I", sorted(word_ids))
+        length_counts = array(
+            "I",
+            [bisect.bisect_left(postings, first_id) for first_id in self._length_starts],
+        )
+        return memoryview(postings), memoryview(length_counts)
+
+    def _suffix_bound(self, key: bytes, upper: bool, low: int = 0) -> int:
+        """Returns the first suffix (in the suffix array) which starts with something bigger than the key,
+        or bigger or equal to it if upper is False"""
+        high = len(self._suffix_array)
+        while low < high:
+            middle = (low + high) // 2
+            position = self._suffix_array[middle]
+            # Words end with a null byte, which is smaller than any letter in the key
+            prefix = bytes(self._word_blob[position : position + len(key)])
+            if prefix < key or upper and prefix == key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class UsedWords:
+    """The words a single bot already used, kept as an overlay on top of the shared index.
+    It's a bitset by word id, so checking and adding a word is O(1) no matter which combo it came from"""
+
+    def __init__(self, word_count: int):
+        self._bits = bytearray((word_count + 7) // 8)
+        # The ids themselves, in the order they were used
+        self._ids = []
+
+    def __contains__(self, word_id: int):
+        return self._bits[word_id >> 3] & (1 << (word_id & 7)) != 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    @property
+    def bits(self):
+        """The bitset itself, bit (id % 8) of byte (id // 8) is set if the word was used"""
+        return self._bits
+
+    def add(self, word_id: int):
+        if word_id not in self:
+            self._bits[word_id >> 3] |= 1 << (word_id & 7)
+            self._ids.append(word_id)
+
+    def clear(self):
+        # Only a few words are used in a game, so unset just their bits
+        for word_id in self._ids:
+            self._bits[word_id >> 3] = 0
+        self._ids.clear()
+
+
+def random_unused(postings, start: int, end: int, used_words: UsedWords, picks: int = 8):
+    """Returns a random unused word id from postings[start:end], or None if all of them were used"""
+    if start == end:
+        return None
+
+    # Usually most of the words aren't used yet, so a few random picks will find one
+    for _ in range(picks):
+        word_id = postings[random.randrange(start, end)]
+        if word_id not in used_words:
+            return word_id
+
+    # Otherwise go over the words from a random point until finding an unused one
+    offset = random.randrange(start, end)
+    for i in itertools.chain(range(offset, end), range(start, offset)):
+        if postings[i] not in used_words:
+            return postings[i]
+
+    return None
+
+
+def encode_varint_deltas(word_ids) -> bytes:
+    """Returns the sorted word ids as the LEB128 varints of the differences between them.
+    Long postings are encoded with numpy if it's installed, the same way decode_varint_deltas decodes them"""
+    if numpy is not None and len(word_ids) >= 512:
+        deltas = numpy.diff(numpy.asarray(word_ids, dtype=numpy.uint32), prepend=0)
+        # How many bytes every varint takes, 7 bits each
+        sizes = 1 + sum(deltas >= 1 << bits for bits in range(7, 35, 7))
+        starts = numpy.cumsum(sizes) - sizes
+        encoded = numpy.empty(int(starts[-1] + sizes[-1]), dtype=numpy.uint8)
+        for i in range(int(sizes.max())):
+            longer = sizes > i
+            more = (sizes[longer] > i + 1).astype(numpy.uint8) << 7
+            encoded[starts[longer] + i] = (deltas[longer] >> 7 * i) & 0x7F | more
+        return encoded.tobytes()
+
+    encoded = bytearray()
+    last = 0
+    for word_id in word_ids:
+        delta = word_id - last
+        last = word_id
+        while delta >= 0x80:
+            encoded.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        encoded.append(delta)
+    return bytes(encoded)
+
+
+def decode_varint_deltas(encoded):
+    """Returns the word ids encoded by encode_varint_deltas, as a memoryview of uint32"""
+    if numpy is None or not len(encoded):
+        word_ids = array("I")
+        word_id = delta = shift = 0
+        for byte in encoded:
+            delta |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                word_id += delta
+                word_ids.append(word_id)
+                delta = shift = 0
+        return memoryview(word_ids)
+
+    encoded = numpy.frombuffer(encoded, dtype=numpy.uint8)
+    # The last byte of every varint doesn't have its high bit set
+    ends = numpy.flatnonzero(encoded < 0x80)
+    starts = numpy.concatenate(([0], ends[:-1] + 1))
+    # How far to shift every byte, by its position in its varint
+    shifts = numpy.arange(len(encoded)) - numpy.repeat(starts, ends - starts + 1)
+    parts = (encoded & 0x7F).astype(numpy.uint32) << (shifts * 7).astype(numpy.uint32)
+    deltas = numpy.add.reduceat(parts, starts)
+    return memoryview(numpy.cumsum(deltas, dtype=numpy.uint32))
+
+
+def letter_mask(word: str) -> int:
+    """Returns a mask of the letters (a-z) in the word, bit 0 being a"""
+    mask = 0
+    for letter in word:
+        if "a" <= letter <= "z":
+            mask |= 1 << (ord(letter) - ord("a"))
+    return mask
+
+
+def index_file(language: str) -> str:
+    """Returns the name of the given language's index file"""
+    if language not in LANGUAGES:
+        raise ValueError(
+            f"No index for language {language}, expected one of {list(LANGUAGES)}"
+        )
+    return f"combo_index_{language}.bin"
+
+
+def shared_index(path: str) -> WordIndex:
+    """Returns the index at the given path, opening it the first time it's requested in this process"""
+    with _shared_indices_lock:
+        if path not in _shared_indices:
+            _shared_indices[path] = WordIndex(path)
+        return _shared_indices[path]